@@ -0,0 +1,68 @@
+# Parse heuristic hàng loạt (không LLM) — nhiều CV / lần gọi, chia chunk qua process pool
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from app.parsers import heuristic_parse
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0")) or (os.cpu_count() or 1)
+BATCH_CHUNK = int(os.getenv("BATCH_CHUNK", "64"))
+# Dưới ngưỡng này chạy luôn trong process hiện tại (chi phí spawn/pickle lớn hơn lợi ích)
+INLINE_MAX = int(os.getenv("BATCH_INLINE_MAX", "32"))
+
+
+def _warm_worker() -> None:
+    # Mỗi worker nạp ontology kỹ năng + regex 1 lần, dùng lại cho mọi chunk
+    from app.utils.skills import get_skill_index
+    get_skill_index()
+
+
+def _parse_chunk(texts: List[str], keep_raw_text: bool = True) -> List[dict]:
+    out = []
+    for t in texts:
+        r = heuristic_parse(t)
+        if not keep_raw_text:
+            r["raw_text"] = None  # không gửi lại text qua IPC nếu caller đã có
+        out.append(r)
+    return out
+
+
+def _chunks(it: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(it)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_many(texts: Iterable[str], workers: Optional[int] = None, chunk_size: int = BATCH_CHUNK,
+               keep_raw_text: bool = True) -> Iterator[dict]:
+    """
+    Parse heuristic cho list/iterator text, trả iterator kết quả theo đúng thứ tự đầu vào
+    (mỗi phần tử giống heuristic_parse / llm_parse khi không có key).
+    Input được đọc lười theo chunk; tối đa 2 chunk / worker đang chờ → bộ nhớ có giới hạn.
+    """
+    workers = BATCH_WORKERS if workers is None else workers
+    chunks = _chunks(texts, chunk_size)
+
+    first = next(chunks, None)
+    if first is None:
+        return
+    if workers <= 1 or len(first) < min(chunk_size, INLINE_MAX):
+        # ít việc (chunk đầu chưa đầy) hoặc ép chạy tuần tự
+        yield from _parse_chunk(first, keep_raw_text)
+        for chunk in chunks:
+            yield from _parse_chunk(chunk, keep_raw_text)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        pending = [pool.submit(_parse_chunk, first, keep_raw_text)]
+        for chunk in chunks:
+            pending.append(pool.submit(_parse_chunk, chunk, keep_raw_text))
+            if len(pending) >= workers * 2:
+                yield from pending.pop(0).result()
+        for fut in pending:
+            yield from fut.result()
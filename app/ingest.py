@@ -0,0 +1,545 @@
+# ===== Ingest hàng loạt offline (backfill): thư mục / zip / tar → NDJSON hoặc Parquet, có checkpoint =====
+#   python -m app.ingest /data/cvs --out cvs.ndjson
+#   python -m app.ingest backfill.zip --out parsed/ --format parquet --workers 16
+#   python -m app.ingest backfill.tar.gz --out cvs.ndjson --resume     # chạy tiếp sau khi bị ngắt
+#   python -m app.ingest /data/cvs --out cvs.ndjson --text-store texts/  # lưu text đã extract (OCR 1 lần)
+#   python -m app.ingest --reparse texts/ --previous cvs.ndjson --out cvs-v2.ndjson
+#
+# Cùng pipeline với /parse-resume-base64 (extract_text_bytes → llm_parse) nhưng không qua HTTP/base64/JSON:
+# - extract (pdfminer / OCR — tốn CPU) chạy trong process pool; worker được thay sau max_tasks_per_child file
+#   (chặn rò rỉ bộ nhớ của pdfium/tesseract); tesseract 1 thread / worker (OMP_THREAD_LIMIT=1) để N worker
+#   không tranh nhau core
+# - parse: không có OPENAI_API_KEY → heuristic ngay trong worker; có key → MicroBatcher ở process cha
+#   (1 scheduler chung → tổng rate không vượt LLM_OPENAI_RPS dù bao nhiêu worker)
+# - bộ nhớ có giới hạn: đọc file lười theo thứ tự; tối đa workers*2 file đang extract + INGEST_LLM_INFLIGHT CV chờ LLM
+# - checkpoint: danh sách source đã ghi xong; --resume bỏ qua chúng (at-least-once: bị ngắt giữa chừng
+#   có thể ghi lặp vài bản ghi cuối — khoá `source` để dedupe)
+# - CV trùng (app/utils/dedup.py, index ở process cha): cùng file → không extract; cùng text → không gọi LLM;
+#   gần trùng / cùng email, SĐT → vẫn parse. Bản ghi có "duplicate" trỏ tới source gặp trước.
+#
+# Re-parse (đổi PROMPT / luật heuristic / PARSER_VERSION): chỉ chạy lại bước parse trên text artifact đã lưu
+# (app/utils/store.py), song song như trên. Bản ghi trong --previous có cùng extractor_version +
+# parse_fingerprint được chép sang nguyên trạng, không parse lại. Khoá checkpoint = content_hash.
+
+import argparse
+import json
+import mimetypes
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.utils.dedup import DEDUP_MODE, DedupIndex, diff_results, sketch
+from app.utils.response import dumps
+from app.utils.store import TextArtifactStore, content_hash, make_artifact
+
+SUPPORTED_EXT = {".pdf", ".docx", ".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp"}
+MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES") or os.getenv("MAX_BYTES", "20000000"))
+LLM_INFLIGHT = int(os.getenv("INGEST_LLM_INFLIGHT", "64"))
+PARQUET_ROWS = int(os.getenv("INGEST_PARQUET_ROWS", "5000"))
+FLUSH_EVERY = 200  # NDJSON: flush + ghi checkpoint mỗi N bản ghi
+MAX_TASKS_PER_CHILD = int(os.getenv("INGEST_MAX_TASKS_PER_CHILD", "500"))
+
+Source = Tuple[str, int, Callable[[], bytes]]  # (khoá, kích thước, hàm đọc bytes)
+# (khoá checkpoint, record ghi ngay | None, (hàm worker, *args) | None)
+Job = Tuple[str, Optional[Dict[str, Any]], Optional[tuple]]
+
+
+# ---------- nguồn file ----------
+
+def _supported(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in SUPPORTED_EXT
+
+
+def iter_sources(path: str) -> Iterator[Source]:
+    """
+    Duyệt thư mục (đệ quy, thứ tự ổn định) hoặc archive zip / tar(.gz/.bz2/.xz).
+    Khoá: đường dẫn tương đối, hoặc "<archive>:<member>". Phải gọi read() trước khi lấy phần tử kế
+    (tar đọc tuần tự).
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if _supported(name):
+                    full = os.path.join(root, name)
+                    yield (os.path.relpath(full, path), os.path.getsize(full),
+                           lambda full=full: open(full, "rb").read())
+        return
+    base = os.path.basename(path)
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as z:
+            for info in sorted(z.infolist(), key=lambda i: i.filename):
+                if not info.is_dir() and _supported(info.filename):
+                    yield f"{base}:{info.filename}", info.file_size, lambda info=info: z.read(info)
+        return
+    if tarfile.is_tarfile(path):
+        with tarfile.open(path, "r:*") as t:
+            for m in t:
+                if m.isfile() and _supported(m.name):
+                    yield f"{base}:{m.name}", m.size, lambda m=m: t.extractfile(m).read()
+        return
+    raise SystemExit(f"không đọc được nguồn: {path} (cần thư mục, .zip hoặc .tar[.gz|.bz2|.xz])")
+
+
+def guess_mime(name: str) -> str:
+    # detect_kind xem magic bytes trước → mime chỉ là gợi ý
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+# ---------- worker ----------
+
+def _init_worker() -> None:
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    from app.batch import _warm_worker
+    _warm_worker()
+
+
+def _drop_raw(result: dict, keep_raw_text: bool) -> dict:
+    if not keep_raw_text:
+        result.pop("raw_text", None)
+    return result
+
+
+def _parse_stage(rec: Dict[str, Any], text: str, parse_inline: bool,
+                 keep_raw_text: bool) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Bước parse chung cho ingest và re-parse: heuristic tại chỗ, hoặc trả text để process cha gửi LLM."""
+    from app.parsers import heuristic_parse, parse_fingerprint
+    rec["parse_fingerprint"] = parse_fingerprint()
+    if not text:
+        rec["error"] = "empty_text_after_extraction"
+        return rec, None
+    rec["_sketch"] = sketch(text)  # process cha tra index trùng rồi bỏ khỏi bản ghi
+    if not parse_inline:
+        return rec, text
+    t1 = time.perf_counter()
+    rec["result"] = _drop_raw(heuristic_parse(text), keep_raw_text)
+    rec["parse_ms"] = round((time.perf_counter() - t1) * 1000, 1)
+    return rec, None
+
+
+def process_file(source: str, data: bytes, ocr_langs: str, parse_inline: bool, keep_raw_text: bool,
+                 text_store: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Extract (+ heuristic parse nếu parse_inline). Trả (record, text còn chờ LLM hoặc None).
+    text_store: thư mục text artifact — có sẵn (cùng EXTRACTOR_VERSION) thì dùng lại, không thì ghi mới.
+    """
+    from app.utils.pdf import EXTRACTOR_VERSION, extract_text_pages
+    digest = content_hash(data)
+    mime = guess_mime(source)
+    rec: Dict[str, Any] = {"source": source, "content_hash": digest, "bytes": len(data), "mime": mime,
+                           "mode": None, "page_modes": [], "chars": 0, "extractor_version": EXTRACTOR_VERSION,
+                           "error": None}
+    store = TextArtifactStore(text_store) if text_store else None
+    t0 = time.perf_counter()
+    art = store.get(digest, EXTRACTOR_VERSION) if store is not None else None
+    if art is not None and art.get("ocr_langs") not in (None, ocr_langs):
+        art = None  # OCR bằng ngôn ngữ khác --ocr-langs → OCR lại
+    if art is None:
+        try:
+            pages, mode = extract_text_pages(data, mime, ocr_langs)
+        except Exception as e:
+            rec["error"] = f"extract_failed: {e}"
+            return rec, None
+        art = make_artifact(digest, pages, mode, EXTRACTOR_VERSION, source, ocr_langs)
+        if store is not None and art["text"].strip():
+            store.put(art)
+    else:
+        rec["text_reused"] = True
+    text = art["text"].strip()
+    rec.update(mode=art["mode"], page_modes=[p["mode"] for p in art["pages"]], chars=len(text),
+               extract_ms=round((time.perf_counter() - t0) * 1000, 1))
+    return _parse_stage(rec, text, parse_inline, keep_raw_text)
+
+
+def reparse_artifact(text_store: str, digest: str, prev_sig: Optional[Tuple[str, str]], parse_inline: bool,
+                     keep_raw_text: bool) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Parse lại 1 text artifact. (None, None) nếu prev_sig == (extractor_version, parse_fingerprint) hiện tại
+    → bản ghi cũ vẫn đúng, process cha chép sang.
+    """
+    from app.parsers import parse_fingerprint
+    art = TextArtifactStore(text_store).get(digest)
+    if art is None:
+        return {"source": None, "content_hash": digest, "error": "text_artifact_unreadable"}, None
+    if prev_sig is not None and prev_sig == (art.get("extractor_version"), parse_fingerprint()):
+        return None, None
+    text = art["text"].strip()
+    rec: Dict[str, Any] = {"source": art.get("source"), "content_hash": digest, "bytes": None, "mime": None,
+                           "mode": art["mode"], "page_modes": [p["mode"] for p in art["pages"]],
+                           "chars": len(text), "extractor_version": art.get("extractor_version"), "error": None}
+    return _parse_stage(rec, text, parse_inline, keep_raw_text)
+
+
+# ---------- output ----------
+
+def _truncate_partial_line(path: str) -> None:
+    """Bị ngắt giữa lúc ghi → dòng cuối dở dang; cắt về newline cuối cùng."""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        pos = size
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            i = chunk.rfind(b"\n")
+            if i >= 0:
+                f.truncate(pos - step + i + 1)
+                return
+            pos -= step
+        f.truncate(0)
+
+
+def read_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {ln.rstrip("\n") for ln in f if ln.endswith("\n")}
+
+
+class NdjsonWriter:
+    def __init__(self, out: str):
+        self.checkpoint_path = out + ".checkpoint"
+        if os.path.exists(out):
+            _truncate_partial_line(out)
+        self.f = open(out, "ab")
+        self.ckpt = open(self.checkpoint_path, "a", encoding="utf-8")
+        self._keys: List[str] = []
+
+    def write(self, rec: Dict[str, Any], key: str) -> None:
+        self.f.write(dumps(rec) + b"\n")
+        self._keys.append(key)
+        if len(self._keys) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        # dữ liệu xuống đĩa trước, checkpoint sau → checkpoint không bao giờ chứa bản ghi chưa ghi
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        if self._keys:
+            self.ckpt.write("".join(k + "\n" for k in self._keys))
+            self.ckpt.flush()
+            self._keys = []
+
+    def close(self) -> None:
+        self.flush()
+        self.f.close()
+        self.ckpt.close()
+
+
+class ParquetWriter:
+    """Thư mục part-00000.parquet, part-00001.parquet...; mỗi part PARQUET_ROWS dòng, ghi tmp rồi rename."""
+
+    META = ["source", "content_hash", "bytes", "mime", "mode", "page_modes", "chars", "extractor_version",
+            "parse_fingerprint", "extract_ms", "parse_ms", "error"]
+
+    def __init__(self, out: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:  # pyarrow không bắt buộc
+            raise SystemExit("--format parquet cần pyarrow: pip install pyarrow")
+        self.pa, self.pq = pa, pq
+        self.schema = pa.schema([
+            ("source", pa.string()), ("content_hash", pa.string()), ("bytes", pa.int64()),
+            ("mime", pa.string()), ("mode", pa.string()), ("page_modes", pa.list_(pa.string())),
+            ("chars", pa.int64()), ("extractor_version", pa.string()), ("parse_fingerprint", pa.string()),
+            ("extract_ms", pa.float64()), ("parse_ms", pa.float64()), ("error", pa.string()),
+            ("full_name", pa.string()), ("email", pa.string()), ("phone", pa.string()),
+            ("location", pa.string()), ("skills", pa.list_(pa.string())), ("result", pa.string()),
+        ])
+        os.makedirs(out, exist_ok=True)
+        self.out = out
+        self.checkpoint_path = os.path.join(out, "_checkpoint")
+        self.part = sum(1 for n in os.listdir(out) if n.startswith("part-") and n.endswith(".parquet"))
+        self.rows: List[Dict[str, Any]] = []
+        self.keys: List[str] = []
+
+    def write(self, rec: Dict[str, Any], key: str) -> None:
+        result = rec.get("result") or {}
+        cand = result.get("candidate") or {}
+        row = {c: rec.get(c) for c in self.META}
+        row.update(full_name=cand.get("full_name"), email=cand.get("email"), phone=cand.get("phone"),
+                   location=cand.get("location"), skills=cand.get("skills") or [],
+                   result=json.dumps(result, ensure_ascii=False) if result else None)
+        self.rows.append(row)
+        self.keys.append(key)
+        if len(self.rows) >= PARQUET_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        path = os.path.join(self.out, f"part-{self.part:05d}.parquet")
+        table = self.pa.Table.from_pylist(self.rows, schema=self.schema)
+        self.pq.write_table(table, path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write("".join(k + "\n" for k in self.keys))
+        self.part += 1
+        self.rows, self.keys = [], []
+
+    def close(self) -> None:
+        self.flush()
+
+
+class PreviousRecords:
+    """
+    Output NDJSON của lần chạy trước, đánh chỉ mục content_hash → offset dòng (không giữ cả file trong RAM).
+    Chỉ bản ghi parse thành công; trùng hash → bản ghi sau cùng thắng.
+    """
+
+    def __init__(self, path: str):
+        if os.path.isdir(path):
+            raise SystemExit("--previous cần file NDJSON (output --format ndjson)")
+        self.f = open(path, "rb")
+        self.index: Dict[str, Tuple[int, Tuple[str, str]]] = {}
+        offset = 0
+        for line in self.f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                rec = {}
+            if rec.get("content_hash") and rec.get("result") is not None and not rec.get("error"):
+                self.index[rec["content_hash"]] = (offset, (rec.get("extractor_version"),
+                                                            rec.get("parse_fingerprint")))
+            offset += len(line)
+
+    def sig(self, digest: str) -> Optional[Tuple[str, str]]:
+        item = self.index.get(digest)
+        return None if item is None else item[1]
+
+    def load(self, digest: str) -> Dict[str, Any]:
+        self.f.seek(self.index[digest][0])
+        return json.loads(self.f.readline())
+
+
+# ---------- điều phối ----------
+
+def _ingest_jobs(src: str, done: Set[str], stats: Dict[str, int], ocr_langs: str, parse_inline: bool,
+                 keep_raw_text: bool, text_store: Optional[str], index: Optional[DedupIndex]) -> Iterator[Job]:
+    from app.parsers import parse_fingerprint
+    fp = parse_fingerprint()
+    for key, size, read in iter_sources(src):
+        if key in done:
+            stats["skipped_done"] += 1
+            continue
+        if size > MAX_BYTES:
+            stats["too_large"] += 1
+            yield key, {"source": key, "bytes": size, "error": "file_too_large"}, None
+            continue
+        data = read()
+        if index is not None:
+            # sha256 ~1GB/s ở process cha — rẻ hơn nhiều so với gửi file sang worker để extract lại
+            digest = content_hash(data)
+            prev, dup = index.result(digest, fp), index.lookup(digest)
+            if prev is not None and dup is not None:
+                stats["duplicates"] += 1
+                yield key, {"source": key, "content_hash": digest, "bytes": len(data), "mime": guess_mime(key),
+                            "parse_fingerprint": fp, "error": None, "result": prev,
+                            "duplicate": {**dup, "reused": True}}, None
+                continue
+        yield key, None, (process_file, key, data, ocr_langs, parse_inline, keep_raw_text, text_store)
+
+
+def _reparse_jobs(text_store: str, done: Set[str], stats: Dict[str, int], previous: Optional[PreviousRecords],
+                  parse_inline: bool, keep_raw_text: bool) -> Iterator[Job]:
+    for digest in TextArtifactStore(text_store).digests():
+        if digest in done:
+            stats["skipped_done"] += 1
+            continue
+        prev_sig = previous.sig(digest) if previous is not None else None
+        yield digest, None, (reparse_artifact, text_store, digest, prev_sig, parse_inline, keep_raw_text)
+
+
+def run(src: str, out: str, fmt: str = "ndjson", workers: Optional[int] = None, resume: bool = False,
+        ocr_langs: str = "vie+eng", keep_raw_text: bool = False, limit: int = 0,
+        progress_every: float = 10.0, max_tasks_per_child: int = MAX_TASKS_PER_CHILD,
+        text_store: Optional[str] = None, reparse: bool = False,
+        previous: Optional[str] = None, dedup: str = DEDUP_MODE) -> Dict[str, Any]:
+    """
+    reparse=True: src là thư mục text artifact; ngược lại src là thư mục / archive CV.
+    dedup: "reuse" | "report" | "off" như DEDUP_MODE (chỉ khi ingest; re-parse đã theo content_hash).
+    """
+    from app.parsers import OPENAI_KEY, MicroBatcher, parse_fingerprint
+
+    workers = workers or os.cpu_count() or 1
+    writer = ParquetWriter(out) if fmt == "parquet" else NdjsonWriter(out)
+    done = read_checkpoint(writer.checkpoint_path) if resume else set()
+    use_llm = bool(OPENAI_KEY)
+    batcher = MicroBatcher(priority="backlog") if use_llm else None
+    prev = PreviousRecords(previous) if previous else None
+    index = DedupIndex() if dedup != "off" and not reparse else None
+    fp = parse_fingerprint()
+
+    stats = {"processed": 0, "errors": 0, "skipped_done": 0, "too_large": 0, "unchanged": 0, "duplicates": 0}
+    if reparse:
+        jobs = _reparse_jobs(src, done, stats, prev, not use_llm, keep_raw_text)
+    else:
+        jobs = _ingest_jobs(src, done, stats, ocr_langs, not use_llm, keep_raw_text, text_store,
+                            index if dedup == "reuse" else None)
+    t_start = t_last = time.perf_counter()
+    in_pool: Set[Future] = set()
+    llm_wait: "deque[Tuple[Dict[str, Any], str, Any, Future, float]]" = deque()
+    llm_pending: Dict[str, Future] = {}  # content_hash → Future LLM chưa emit
+
+    def emit(rec: Dict[str, Any], key: str, sk=None) -> None:
+        if index is not None and rec.get("content_hash") and rec.get("result") and not rec.get("error"):
+            result = {k: v for k, v in rec["result"].items() if k != "raw_text"}
+            index.add(rec["content_hash"], sk, label=rec.get("source"), result=result, fingerprint=fp)
+        writer.write(rec, key)
+        stats["processed"] += 1
+        if rec.get("error"):
+            stats["errors"] += 1
+
+    def finish_llm(block: bool) -> None:
+        while llm_wait and (block or llm_wait[0][3].done()):
+            rec, key, sk, fut, t1 = llm_wait.popleft()
+            if llm_pending.get(rec["content_hash"]) is fut:
+                del llm_pending[rec["content_hash"]]
+            try:
+                rec["result"] = _drop_raw(dict(fut.result()), keep_raw_text)
+                rec["parse_ms"] = round((time.perf_counter() - t1) * 1000, 1)
+            except Exception as e:
+                rec["error"] = f"llm_failed: {e}"
+            emit(rec, key, sk)
+            if block and len(llm_wait) < LLM_INFLIGHT:
+                return
+
+    def collect(futs) -> None:
+        for fut in futs:
+            in_pool.discard(fut)
+            try:
+                rec, text = fut.result()
+            except Exception as e:  # worker chết (OOM, segfault trong lib C...)
+                rec, text = {"source": fut.key, "error": f"worker_failed: {e}"}, None
+            if rec is None:  # re-parse: input + version không đổi → chép bản ghi cũ
+                stats["unchanged"] += 1
+                emit(prev.load(fut.key), fut.key)
+                continue
+            sk = rec.pop("_sketch", None)
+            fut_llm = None
+            if index is not None and sk is not None:
+                dup = index.lookup(rec["content_hash"], sk)
+                # đưa vào index ngay (kết quả gắn sau, lúc emit) → bản trùng tới khi LLM chưa xong vẫn nhận ra
+                index.add(rec["content_hash"], sk, label=rec.get("source"))
+                if dup is not None:
+                    stats["duplicates"] += 1
+                    earlier = index.result(dup["content_hash"], fp)
+                    # chỉ "dùng lại" khi thật sự bỏ được 1 lần gọi LLM (heuristic đã chạy sẵn trong worker)
+                    reusable = dedup == "reuse" and text is not None and index.reusable(dup)
+                    if reusable and earlier is not None:
+                        rec["result"], text = dict(earlier), None
+                    elif reusable and dup["content_hash"] in llm_pending:
+                        fut_llm = llm_pending[dup["content_hash"]]  # CV giống hệt đang chờ LLM → dùng chung kết quả
+                    else:
+                        reusable = False
+                    rec["duplicate"] = {**dup, "reused": reusable}
+                    if not reusable and earlier is not None and rec.get("result") is not None:
+                        rec["duplicate"]["diff"] = diff_results(earlier, rec["result"])
+            if text is None:
+                emit(rec, fut.key, sk)
+            else:
+                if fut_llm is None:
+                    fut_llm = llm_pending[rec["content_hash"]] = batcher.submit(text)
+                llm_wait.append((rec, fut.key, sk, fut_llm, time.perf_counter()))
+        finish_llm(block=len(llm_wait) >= LLM_INFLIGHT)
+
+    def report(final: bool = False) -> None:
+        el = time.perf_counter() - t_start
+        rate = stats["processed"] / el if el > 0 else 0.0
+        print(f"[ingest] {'done' if final else 'progress'}: {stats['processed']} files ({stats['errors']} errors, "
+              f"{stats['duplicates']} duplicates, {stats['unchanged']} unchanged, "
+              f"{stats['skipped_done']} skipped) in {el:.1f}s — "
+              f"{rate:.1f} files/s, in pool {len(in_pool)}, waiting LLM {len(llm_wait)}", file=sys.stderr)
+
+    submitted = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 max_tasks_per_child=max_tasks_per_child) as pool:
+            for key, rec, task in jobs:
+                if rec is not None:
+                    emit(rec, key)
+                    continue
+                if limit and submitted >= limit:
+                    break
+                while len(in_pool) >= workers * 2:
+                    finished, _ = wait(in_pool, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                fut = pool.submit(*task)
+                fut.key = key
+                in_pool.add(fut)
+                submitted += 1
+                if time.perf_counter() - t_last >= progress_every:
+                    t_last = time.perf_counter()
+                    report()
+            while in_pool:
+                finished, _ = wait(in_pool, return_when=FIRST_COMPLETED)
+                collect(finished)
+        if batcher is not None:
+            batcher.flush()
+            while llm_wait:
+                finish_llm(block=True)
+            batcher.close()
+    finally:
+        writer.close()
+    report(final=True)
+    stats["seconds"] = round(time.perf_counter() - t_start, 2)
+    return stats
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.ingest",
+                                 description="Parse hàng loạt CV từ thư mục / zip / tar (backfill offline)")
+    ap.add_argument("src", help="thư mục, .zip hoặc .tar[.gz|.bz2|.xz]; với --reparse: thư mục text artifact")
+    ap.add_argument("--out", required=True, help="file .ndjson, hoặc thư mục khi --format parquet")
+    ap.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson")
+    ap.add_argument("--workers", type=int, default=0, help="số process extract (mặc định = số core)")
+    ap.add_argument("--resume", action="store_true", help="bỏ qua các file đã có trong checkpoint")
+    ap.add_argument("--overwrite", action="store_true", help="xoá output + checkpoint cũ rồi chạy lại từ đầu")
+    ap.add_argument("--ocr-langs", default=os.getenv("OCR_LANGS", "vie+eng").replace(" ", ""))
+    ap.add_argument("--keep-raw-text", action="store_true", help="giữ raw_text trong kết quả")
+    ap.add_argument("--limit", type=int, default=0, help="chỉ xử lý N file mới (thử nghiệm)")
+    ap.add_argument("--progress", type=float, default=10.0, help="giây giữa 2 dòng tiến độ")
+    ap.add_argument("--max-tasks-per-child", type=int, default=MAX_TASKS_PER_CHILD)
+    ap.add_argument("--text-store", default=os.getenv("TEXT_STORE_DIR") or None,
+                    help="thư mục lưu / dùng lại text đã extract (mặc định TEXT_STORE_DIR)")
+    ap.add_argument("--reparse", action="store_true", help="chỉ parse lại text artifact trong src, không extract")
+    ap.add_argument("--previous", help="output NDJSON lần trước: bản ghi cùng version được chép, không parse lại")
+    ap.add_argument("--dedup", choices=["reuse", "report", "off"], default=DEDUP_MODE,
+                    help="CV trùng: dùng lại kết quả / chỉ đánh dấu / tắt (mặc định DEDUP_MODE)")
+    a = ap.parse_args(argv)
+    if a.previous and not a.reparse:
+        ap.error("--previous chỉ dùng với --reparse")
+    if a.reparse and not os.path.isdir(a.src):
+        ap.error(f"--reparse cần thư mục text artifact: {a.src}")
+
+    exists = os.path.exists(a.out) and (os.path.isfile(a.out) or os.listdir(a.out))
+    if exists and not (a.resume or a.overwrite):
+        print(f"{a.out} đã tồn tại — dùng --resume để chạy tiếp hoặc --overwrite để chạy lại", file=sys.stderr)
+        return 2
+    if exists and a.overwrite:
+        if os.path.isdir(a.out):
+            for n in os.listdir(a.out):
+                if n.startswith("part-") or n == "_checkpoint":
+                    os.remove(os.path.join(a.out, n))
+        else:
+            os.remove(a.out)
+            if os.path.exists(a.out + ".checkpoint"):
+                os.remove(a.out + ".checkpoint")
+
+    stats = run(a.src, a.out, a.format, a.workers or None, a.resume, a.ocr_langs, a.keep_raw_text,
+                a.limit, a.progress, a.max_tasks_per_child, a.text_store, a.reparse, a.previous, a.dedup)
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,48 @@
-import os, base64
-from fastapi import FastAPI, HTTPException
+import os, base64, hashlib, time
+_IMPORT_T0 = time.perf_counter()  # mốc đo cold start (import → ready)
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Callable
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-from app.parsers import llm_parse
+from app.parsers import llm_parse, parse_fingerprint, PARSER_VERSION
+from app.utils.response import json_response, project, parse_fields
+from app.utils.metrics import (stage, begin_request, server_timing, render_prometheus,
+                               REQUEST_SECONDS, REQUESTS, CACHE)
+from app.utils import profiling, warmup
+from app.utils.profiling import profiled
+from app.utils.store import RAW_TEXTS, TEXT_ARTIFACTS, content_hash, make_artifact, ocr_langs_of
+from app.utils.dedup import DEDUP, DEDUP_MODE, diff_results, sketch
+from app.utils.upload import StreamingUpload, multipart_boundary
+from starlette.concurrency import run_in_threadpool
+from app.utils.ratelimit import get_scheduler, schedulers_state, estimate_tokens
 from app.utils.common import fetch_bytes_from_url, gs_post, _guess_mime, extract_address
-from app.utils.pdf import (resolve_model_name,
+from app.utils.pdf import (resolve_model_name, gemini_client, GEMINI_REQUEST_OPTIONS,
                            coerce_str, json_coerce, to_skills_str,
                            norm_email, norm_phone, clean_location, extract_position,
                            extract_drive_file_id, download_drive_file, drive_direct_url,
-                           truncate_text, extract_text_bytes)
+                           truncate_text, extract_text_pages, build_image_payload, build_photo_payload,
+                           EXTRACTOR_VERSION)
+from app.ocr import detect_kind
 from app.promt.geminni import PROMPT_RESUME_PARSER
 load_dotenv()
+_IMPORT_DONE = time.perf_counter()
 GS_URL = os.getenv("GS_URL")
 GS_TOKEN = os.getenv("GS_TOKEN")
 
 
-app = FastAPI(title="Resume OCR+Parser API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # warm-up (OCR, LLM client, ontology/regex) trước khi /ready trả 200 — xem app/utils/warmup.py
+    warmup.start(_IMPORT_T0, _IMPORT_DONE)
+    yield
+
+
+app = FastAPI(title="Resume OCR+Parser API", version="1.0.0", lifespan=lifespan)
 
 
 # ENV
@@ -39,6 +63,32 @@ app.add_middleware(
 )
 
 
+# Đo thời gian mỗi request + header Server-Timing (các stage do stage() ghi lại)
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    timings = begin_request()
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    total = time.perf_counter() - t0
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    REQUEST_SECONDS.observe(total, path=path)
+    REQUESTS.inc(path=path, status=response.status_code)
+    response.headers["Server-Timing"] = server_timing(timings, total)
+    warmup.record_request(path, total)
+    return response
+
+
+# Profile theo yêu cầu: header X-Profile-Token = PROFILE_ADMIN_TOKEN, hoặc lấy mẫu PROFILE_SAMPLE_RATE
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    state = profiling.begin_request(request.headers)
+    response = await call_next(request)
+    if state is not None and state["saved"]:
+        response.headers["X-Profile-Id"] = state["id"]
+    return response
+
+
 class UrlReq(BaseModel):
     file_url: str
     file_mime: str | None = None
@@ -57,7 +107,51 @@ def health():
     return {"ok": True}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 tới khi warm-up xong; body có thời gian cold start + request đầu tiên."""
+    state = warmup.status()
+    return json_response(state, status_code=200 if state["ready"] else 503)
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition: histogram theo stage/endpoint + counter cache/OCR/token/bytes."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def _require_admin(request: Request):
+    if not profiling.check_admin_token(request.headers.get("x-admin-token")):
+        raise HTTPException(403, "admin_token_required")
+
+
+@app.get("/admin/profiles")
+def admin_profiles(request: Request):
+    _require_admin(request)
+    return {"ok": True, "dir": profiling.PROFILE_DIR, "profiles": profiling.list_profiles()}
+
+
+@app.get("/admin/profiles/{request_id}")
+def admin_profile(request_id: str, request: Request, format: str = "text"):
+    """format=text: top hàm theo cumulative; format=pstats: file .prof (mở bằng snakeviz / pstats)."""
+    _require_admin(request)
+    path = profiling.profile_path(request_id, ".prof" if format == "pstats" else ".txt")
+    if not path:
+        raise HTTPException(404, "profile_not_found")
+    if format == "pstats":
+        return FileResponse(path, media_type="application/octet-stream", filename=f"{request_id}.prof")
+    with open(path, encoding="utf-8") as f:
+        return PlainTextResponse(f.read())
+
+
+@app.get("/llm/scheduler")
+def llm_scheduler_state():
+    """Trạng thái token bucket / AIMD / hàng đợi của từng provider LLM."""
+    return {"ok": True, "schedulers": schedulers_state()}
+
+
 @app.post("/parse-resume")
+@profiled
 def parse_resume():
     """
     1) Lấy message mới nhất từ Apps Script (label: New_Apply_Emails has:attachment)
@@ -84,11 +178,10 @@ def parse_resume():
     except Exception as e:
         raise HTTPException(400, f"fetch_failed: {e}")
 
-    text, mode = extract_text_bytes(data, file_mime, OCR_LANGS)
-    if not text.strip():
-        raise HTTPException(422, "empty_text_after_extraction")
-
-    raw = llm_parse(text) or {}
+    # CV đã parse (cùng file / cùng text) → dùng lại kết quả, không extract / gọi LLM lại
+    digest = content_hash(data)
+    raw, _, duplicate = parse_with_dedup(data, digest, file_mime, OCR_LANGS, parse_fingerprint(),
+                                         lambda t, _: llm_parse(t) or {})
     cand = (raw.get("candidate") or {})
 
     skills_str = to_skills_str(cand.get("skills") or cand.get("skill") or raw.get("skills"))
@@ -110,7 +203,7 @@ def parse_resume():
 
     position = extract_position(subject)
 
-    return {
+    out = {
         "ok": True,
         "parser_version": "v1",
         "message_id": message_id,
@@ -118,6 +211,7 @@ def parse_resume():
         "position": position,
         "file_url": file_url,
         "file_id": file_info.get("file_id"),
+        "content_hash": digest,
         "candidate": {
             "full_name": (cand.get("full_name") or "").strip(),
             "email": (cand.get("email") or "").strip(),
@@ -128,11 +222,21 @@ def parse_resume():
             "gpa": gpa,
         }
     }
+    if duplicate is not None:
+        out["duplicate"] = duplicate
+    return json_response(out)
+
+@lru_cache(maxsize=8)
+def _gemini_fingerprint(model_name: str) -> str:
+    """Như parse_fingerprint cho nhánh Gemini: đổi prompt / model → kết quả cũ không được dùng lại."""
+    h = hashlib.sha256("\0".join((PARSER_VERSION, model_name, PROMPT_RESUME_PARSER)).encode("utf-8"))
+    return f"{PARSER_VERSION}-gemini-{h.hexdigest()[:12]}"
+
 
 # Đọc PDF với Gemini
 @app.post("/gemini/parse-resume")
+@profiled
 def parse_resume_gemini():
-    client = genai
     # Lấy file info
     newest = gs_post({"token": GS_TOKEN, "action": "get_newest_message_id"})
     message_id = newest["message_id"]
@@ -151,7 +255,7 @@ def parse_resume_gemini():
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise HTTPException(500, "missing_env_GEMINI_API_KEY")
-    client.configure(api_key=api_key)
+    client = gemini_client(api_key)
 
     # 2) Lấy file từ Google Drive
     drive_url = coerce_str(file_url)
@@ -163,33 +267,64 @@ def parse_resume_gemini():
     except HTTPException as e:
         raise e
 
-    pdf_bytes = download_drive_file(file_id)
+    try:
+        pdf_bytes = download_drive_file(file_id)
+    except Exception as e:
+        raise HTTPException(502, f"drive_download_failed: {e}")
     if not pdf_bytes:
         raise HTTPException(422, "empty_file_downloaded")
 
-    # 3) Trích TEXT trước khi gọi Gemini
-    file_mime = "application/pdf"
-    text, kind = extract_text_bytes(pdf_bytes, file_mime, "vie+eng")
-
-    # 4) Gọi Gemini (model hợp lệ)
+    # 3) Trích TEXT trước khi gọi Gemini (loại file nhận theo magic bytes: PDF / DOCX / ảnh)
+    file_kind = detect_kind(pdf_bytes, file_mime)
     model_name = resolve_model_name()
-    model = client.GenerativeModel(model_name=model_name)
-
-    try:
-        if kind == "text" and text and len(text.strip()) >= 100:
-            # ✅ PDF có text thật → gửi TEXT
-            text_for_llm = truncate_text(text)
-            resp = model.generate_content([PROMPT_RESUME_PARSER, text_for_llm])
-        else:
-            # ⚠️ PDF scan/ít text → gửi BLOB PDF
-            pdf_blob = {"mime_type": "application/pdf", "data": pdf_bytes}
-            resp = model.generate_content([PROMPT_RESUME_PARSER, pdf_blob])
-    except Exception as e:
-        raise HTTPException(502, f"gemini_error: {e}")
-
-    # 5) Parse JSON từ model
-    raw = json_coerce(coerce_str(getattr(resp, "text", ""))) or {}
-    cand = raw.get("candidate") if isinstance(raw, dict) else {}
+    payload_info = None  # None = dùng lại kết quả cũ, không gọi Gemini
+
+    def gemini_parse(text: str, kind: str) -> dict:
+        nonlocal payload_info
+        # 4) Gọi Gemini (model hợp lệ)
+        model = client.GenerativeModel(model_name=model_name)
+        try:
+            if kind == "text" and text and (len(text.strip()) >= 100 or file_kind != "pdf"):
+                # ✅ PDF có text thật / DOCX → gửi TEXT
+                text_for_llm = truncate_text(text)
+                contents = [PROMPT_RESUME_PARSER, text_for_llm]
+                est = estimate_tokens(PROMPT_RESUME_PARSER, text_for_llm)
+                payload_info = {"kind": "text", "bytes": len(text_for_llm.encode("utf-8")),
+                                "original_bytes": len(pdf_bytes)}
+            else:
+                # ⚠️ PDF scan/ít text → gửi ẢNH các trang (xám, nén, trong budget) thay vì cả PDF;
+                # file ảnh → thu nhỏ từng frame (TIFF nhiều trang) hoặc gửi nguyên với MIME thật
+                with stage("image_payload"):
+                    if file_kind == "image":
+                        parts, payload_info = build_photo_payload(pdf_bytes, file_mime)
+                    else:
+                        parts, payload_info = build_image_payload(pdf_bytes)
+                if not parts:
+                    raise HTTPException(422, "unsupported_image")
+                contents = [PROMPT_RESUME_PARSER, *parts]
+                est = estimate_tokens(PROMPT_RESUME_PARSER) + 1000 * len(parts)  # ~ token/ảnh
+            resp = get_scheduler("gemini").call(
+                lambda: model.generate_content(contents, request_options=GEMINI_REQUEST_OPTIONS), tokens=est)
+        except HTTPException:
+            raise
+        except ValueError as e:
+            if str(e) == "image_too_large":
+                raise HTTPException(413, "image_too_large")
+            raise HTTPException(502, f"gemini_error: {e}")
+        except Exception as e:
+            raise HTTPException(502, f"gemini_error: {e}")
+
+        # 5) Parse JSON từ model
+        raw = json_coerce(coerce_str(getattr(resp, "text", ""))) or {}
+        return raw if isinstance(raw, dict) else {}
+
+    # CV đã parse bằng cùng prompt + model (cùng file / cùng text) → dùng lại, không gọi Gemini.
+    # Chỉ đọc text layer để tra trùng: ảnh / PDF scan không OCR (Gemini nhận ảnh trang, OCR chỉ để sketch là phí)
+    # DOCX rỗng / .doc / định dạng lạ: không có gì để gửi → 422 (không gửi bytes gốc dưới nhãn PDF)
+    digest = content_hash(pdf_bytes)
+    raw, _, duplicate = parse_with_dedup(pdf_bytes, digest, file_mime, "vie+eng", _gemini_fingerprint(model_name),
+                                         gemini_parse, require_text=file_kind not in ("pdf", "image"), ocr=False)
+    cand = raw.get("candidate")
     if not isinstance(cand, dict):
         cand = {}
 
@@ -209,14 +344,16 @@ def parse_resume_gemini():
     phone    = norm_phone(coerce_str(cand.get("phone")))
     location = clean_location(coerce_str(cand.get("location")))
 
-    return {
+    out = {
         "ok": True,
         "parser_version": "v1",
         "message_id": message_id,
         "subject": subject,
         "position": position,
-        "file_url": f"https://drive.google.com/uc?export=download&id={file_id}",
+        "file_url": drive_direct_url(file_id),
         "file_id": file_id,
+        "llm_payload": payload_info,
+        "content_hash": digest,
         "candidate": {
             "full_name": coerce_str(cand.get("full_name")),
             "email": email,
@@ -227,22 +364,206 @@ def parse_resume_gemini():
             "gpa": gpa,
         }
     }
+    if duplicate is not None:
+        out["duplicate"] = duplicate
+    return json_response(out)
 
 @app.post("/parse-resume-base64")
-def parse_resume_b64(req: B64Req):
+@profiled
+def parse_resume_b64(req: B64Req, request: Request, fields: str | None = None, include_raw_text: bool = False):
+    """
+    fields: chỉ trả các trường chọn, VD `fields=candidate.email,candidate.skills,education`
+    raw_text mặc định KHÔNG trả về (lấy riêng qua GET /raw-text/{content_hash})
+    trừ khi include_raw_text=true hoặc có "raw_text" trong fields.
+    """
     try:
         data = base64.b64decode(req.file_base64)
     except Exception:
         raise HTTPException(400, "invalid_base64")
     if len(data) > MAX_BYTES:
         raise HTTPException(413, "file_too_large")
-    text, mode = extract_text_bytes(data, req.file_mime, req.lang_hint or OCR_LANGS)
-    if not text.strip():
+    return parse_bytes_response(data, content_hash(data), req.file_mime, req.lang_hint,
+                                fields, include_raw_text, request)
+
+
+@app.post("/parse-resume-upload")
+async def parse_resume_upload(request: Request, fields: str | None = None, include_raw_text: bool = False):
+    """
+    Upload multipart/form-data: part `file` (bắt buộc), `file_mime`, `lang_hint` (tuỳ chọn).
+    File được stream vào buffer tạm, tính sha256 và chặn MAX_BYTES ngay trong lúc nhận.
+    Kết quả giống /parse-resume-base64.
+    """
+    boundary = multipart_boundary(request.headers.get("content-type", ""))
+    if not boundary:
+        raise HTTPException(400, "multipart_form_data_required")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_BYTES + 64 * 1024:
+        raise HTTPException(413, "file_too_large")
+
+    upload = StreamingUpload(MAX_BYTES)
+    try:
+        parser = upload.parser(boundary)
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if upload.too_large:
+                    raise HTTPException(413, "file_too_large")
+            parser.finalize()
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(400, f"invalid_multipart: {e}")
+        if not upload.has_file:
+            raise HTTPException(400, "file_required")
+
+        ct = upload.content_type if upload.content_type != "application/octet-stream" else None
+        mime = upload.fields.get("file_mime") or ct or _guess_mime(upload.filename or "")
+        data = upload.read_bytes()
+    finally:
+        upload.close()
+    return await run_in_threadpool(parse_bytes_response, data, upload.digest, mime,
+                                   upload.fields.get("lang_hint"), fields, include_raw_text, request)
+
+
+def _cached_item(digest: str) -> tuple[str, str, str | None] | None:
+    """(text, kind, ocr_langs) đã extract: RAM (RAW_TEXTS) → text artifact trên đĩa (nạp lại vào RAM)."""
+    item = RAW_TEXTS.get(digest)
+    CACHE.inc(cache="raw_text", result="hit" if item is not None else "miss")
+    if item is None and TEXT_ARTIFACTS is not None:
+        art = TEXT_ARTIFACTS.get(digest, EXTRACTOR_VERSION)
+        CACHE.inc(cache="text_artifact", result="hit" if art is not None else "miss")
+        if art is not None:
+            item = art["text"].strip(), art["mode"], art.get("ocr_langs")
+            RAW_TEXTS.put(digest, *item)
+    return item
+
+
+def _ocr_langs_differ(item: tuple[str, str, str | None] | None, lang: str | None) -> bool:
+    """Text đã cache là kết quả OCR với ngôn ngữ khác lang (lang_hint đổi) → phải OCR lại."""
+    return lang is not None and item is not None and item[2] is not None and item[2] != lang
+
+
+def cached_text(digest: str, lang: str | None = None) -> tuple[str, str] | None:
+    """
+    (text, kind) đã extract của content hash: RAM (RAW_TEXTS) → text artifact trên đĩa (TEXT_STORE_DIR — còn sau
+    restart / eviction, dùng chung giữa các worker; nạp lại vào RAM). None nếu chưa có.
+    lang: ngôn ngữ OCR yêu cầu — text OCR bằng ngôn ngữ khác coi như chưa có (text layer / DOCX thì không phụ thuộc).
+    """
+    item = _cached_item(digest)
+    if item is None:
+        return None
+    if _ocr_langs_differ(item, lang):
+        CACHE.inc(cache="raw_text", result="lang_mismatch")
+        return None
+    return item[0], item[1]
+
+
+def extract_cached(data: bytes, digest: str, mime: str, lang: str, ocr: bool = True) -> tuple[str, str]:
+    """
+    (text, kind) của file theo content hash: RAM (RAW_TEXTS) → text artifact trên đĩa → extract_text_pages
+    (extract mới → ghi artifact). Text rỗng không được cache.
+    Text OCR cache theo content hash + ngôn ngữ OCR (lang): gửi lại file với lang_hint khác → OCR lại.
+    ocr=False: không OCR (ảnh / PDF scan → ""), text OCR đã cache từ trước (ngôn ngữ nào cũng được) vẫn được trả.
+    """
+    cached = cached_text(digest, lang if ocr else None)
+    if cached is not None:
+        return cached
+    with stage("extract"):
+        try:
+            pages, mode = extract_text_pages(data, mime, lang, ocr=ocr)
+        except ValueError as e:
+            if str(e) == "image_too_large":
+                raise HTTPException(413, "image_too_large")
+            raise
+    text = "".join(t for t, _ in pages).strip()
+    if text:
+        if TEXT_ARTIFACTS is not None:
+            TEXT_ARTIFACTS.put(make_artifact(digest, pages, mode, EXTRACTOR_VERSION, ocr_langs=lang))
+        RAW_TEXTS.put(digest, text, mode, ocr_langs_of(pages, lang))
+    return text, mode
+
+
+def parse_with_dedup(data: bytes, digest: str, mime: str, lang: str, fp: str, parse: Callable[[str, str], dict],
+                     require_text: bool = True, ocr: bool = True) -> tuple[dict, str | None, dict | None]:
+    """
+    Tra trùng quanh 1 lần parse (app/utils/dedup.py), dùng chung cho mọi endpoint nhận file:
+    exact (content hash, trước cả extract) → extract_cached → sketch → reuse kết quả cũ / parse(text, kind) → DEDUP.add.
+    fp: fingerprint của parser (kết quả chỉ dùng lại giữa các lần parse cùng fingerprint).
+    require_text=False: text rỗng vẫn parse (Gemini nhận ảnh), chỉ tra theo content hash.
+    ocr=False: sketch chỉ từ text layer / DOCX — không OCR khi parser không cần text (Gemini gửi ảnh trang).
+    Trả (kết quả, text — None nếu dùng lại theo exact, khối "duplicate" hoặc None).
+    """
+    # cùng file đã parse (cùng prompt / luật) → trả luôn, bỏ qua cả extract lẫn LLM
+    # (trừ khi text của lần trước là OCR bằng ngôn ngữ khác lang: lang_hint đổi → OCR + parse lại)
+    if DEDUP_MODE == "reuse":
+        prev, dup = DEDUP.result(digest, fp), DEDUP.lookup(digest)
+        if prev is not None and dup is not None and not (ocr and _ocr_langs_differ(_cached_item(digest), lang)):
+            CACHE.inc(cache="dedup", result="exact")
+            return dict(prev), None, {**dup, "reused": True}
+
+    text, mode = extract_cached(data, digest, mime, lang, ocr=ocr)
+    if require_text and not text:
         raise HTTPException(422, "empty_text_after_extraction")
-    parsed = llm_parse(text)
-    parsed.update({"ok": True, "parser_version": "v1"})
+
+    dup = prev = sk = None
+    if DEDUP_MODE != "off":
+        with stage("dedup"):
+            # không có text → không sketch được: chỉ tra content hash, bỏ near / email / phone
+            sk = sketch(text) if text else None
+            dup = DEDUP.lookup(digest, sk)
+        CACHE.inc(cache="dedup", result=dup["match"] if dup else "miss")
+        if dup is not None:
+            prev = DEDUP.result(dup["content_hash"], fp)
+    reused = DEDUP_MODE == "reuse" and prev is not None and DEDUP.reusable(dup)
+    parsed = dict(prev) if reused else parse(text, mode)
+    if DEDUP_MODE != "off":
+        DEDUP.add(digest, sk, result={k: v for k, v in parsed.items() if k != "raw_text"}, fingerprint=fp)
+    duplicate = None
+    if dup is not None:
+        duplicate = {**dup, "reused": reused}
+        if not reused and prev is not None:
+            duplicate["diff"] = diff_results(prev, parsed)
+    return parsed, text, duplicate
+
+
+@profiled
+def parse_bytes_response(data: bytes, digest: str, mime: str, lang_hint: str | None,
+                         fields: str | None, include_raw_text: bool, request: Request):
+    """
+    Pipeline chung cho file đã nhận: (cache text theo hash: RAM → đĩa) → extract → (tra trùng) → llm_parse → shape.
+    CV trùng / gần trùng CV đã xử lý: response có "duplicate" (app/utils/dedup.py).
+    """
+    parsed, text, duplicate = parse_with_dedup(data, digest, mime, lang_hint or OCR_LANGS, parse_fingerprint(),
+                                               lambda t, _: llm_parse(t))
+    if text is None:
+        if include_raw_text or "raw_text" in parse_fields(fields):
+            item = cached_text(digest)
+            parsed["raw_text"] = item[0] if item is not None else None
+    else:
+        parsed["raw_text"] = text
+    parsed.update({"ok": True, "parser_version": PARSER_VERSION, "content_hash": digest})
+    if duplicate is not None:
+        parsed["duplicate"] = duplicate
+    return json_response(shape_result(parsed, fields, include_raw_text), request)
+
+
+def shape_result(parsed: dict, fields: str | None, include_raw_text: bool) -> dict:
+    wanted = parse_fields(fields)
+    if not include_raw_text and "raw_text" not in wanted:
+        parsed.pop("raw_text", None)
+    if wanted:
+        parsed = project(parsed, ["ok", "parser_version", "content_hash", "duplicate", *wanted])
     return parsed
 
+
+@app.get("/raw-text/{digest}")
+def get_raw_text(digest: str, request: Request):
+    item = cached_text(digest)
+    if item is None:
+        raise HTTPException(404, "raw_text_not_found")
+    text, mode = item
+    return json_response({"ok": True, "content_hash": digest, "mode": mode, "raw_text": text}, request)
+
     # # custom response
     # raw = llm_parse(text) or {}  # có thể là {}, None
     # # Hỗ trợ cả 2 kiểu: candidate.* hoặc field ở root (đề phòng LLM lệch format)
@@ -1,55 +1,164 @@
 # Xử lý OCR
 
 import os, io
-from typing import Tuple
-from pdfminer.high_level import extract_text as pdf_extract_text
-from PIL import Image
-import pytesseract
-import pypdfium2 as pdfium
+from typing import TYPE_CHECKING, Iterable, Iterator, Tuple
+
+from app.utils.docx import extract_docx_text, is_docx
+from app.utils.metrics import stage, OCR_PAGES
 
 
 SUPPORTED_IMG = {"png","jpg","jpeg","bmp","tif","tiff"}
 
+# Ảnh đầu vào: cạnh dài tối đa khi OCR (ảnh điện thoại 12MP 4032px → draft 1/2 ≈ 2016px)
+OCR_MAX_SIDE = int(os.getenv("OCR_IMAGE_MAX_SIDE", "2000"))
+# Ngân sách pixel / trang (sau khi decode rút gọn) và số trang tối đa của TIFF nhiều trang
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", "40000000"))
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "20"))
+
 
 # Cho Windows: nếu có biến env TESSERACT_CMD thì dùng
 TESSERACT_CMD = os.getenv("TESSERACT_CMD")
-if TESSERACT_CMD:
-    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+# pdfminer / pypdfium2 / pytesseract / PIL chỉ import khi nhánh tương ứng chạy lần đầu
+# (worker chỉ nhận DOCX hoặc chỉ gọi Gemini không phải trả chi phí này lúc khởi động)
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+def _tesseract():
+    import pytesseract
+    if TESSERACT_CMD:
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return pytesseract
 
 
 
 
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
 def mime_to_ext(mime: str) -> str:
     return {
         "image/png":"png","image/jpeg":"jpg","image/jpg":"jpg",
         "image/bmp":"bmp","image/tiff":"tiff","image/tif":"tif",
-        "application/pdf":"pdf"
+        "application/pdf":"pdf",
+        DOCX_MIME:"docx","application/msword":"doc"
     }.get((mime or "").lower(), "")
 
 
+def detect_kind(data: bytes, mime: str) -> str:
+    """Loại file theo magic bytes (ưu tiên) rồi tới MIME: "pdf" | "docx" | "doc" | "image" | ""."""
+    head = data[:8]
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx" if is_docx(data) else ""
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        return "doc"
+    if head.startswith((b"\x89PNG", b"\xff\xd8", b"II*\x00", b"MM\x00*", b"BM")):
+        return "image"
+    ext = mime_to_ext(mime)
+    if ext in SUPPORTED_IMG:
+        return "image"
+    return ext
+
+
+
+
+def ocr_page_texts(pages: Iterable["Image.Image"], ocr_langs: str) -> Iterator[str]:
+    """Pipeline OCR chung theo trang (trang PDF đã render, ảnh, frame TIFF): text từng trang, kể cả trang rỗng."""
+    pytesseract = _tesseract()
+    for im in pages:
+        with stage("ocr_page"):
+            txt = pytesseract.image_to_string(im, lang=ocr_langs)
+        OCR_PAGES.inc()
+        yield txt or ""
+
+
+def _ocr_pages(pages: Iterable["Image.Image"], ocr_langs: str) -> str:
+    return "\n".join(t for t in ocr_page_texts(pages, ocr_langs) if t)
+
+
+def _pdf_pages(data: bytes, max_pages: int = OCR_MAX_PAGES) -> Iterator["Image.Image"]:
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(data)
+    for page_index in range(min(len(pdf), max_pages)):
+        with stage("pdf_render"):
+            page = pdf.get_page(page_index)
+            bitmap = page.render(scale=2.0).to_pil()
+        yield bitmap
+
+
+def _fit_size(size: Tuple[int, int], max_side: int) -> Tuple[int, int]:
+    w, h = size
+    scale = min(1.0, max_side / float(max(w, h) or 1))
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+def iter_image_pages(data: bytes, max_side: int = OCR_MAX_SIDE,
+                     max_pixels: int = OCR_MAX_PIXELS, max_pages: int = OCR_MAX_PAGES) -> Iterator["Image.Image"]:
+    """
+    Decode ảnh thành các trang ảnh xám cho OCR, lười theo từng frame:
+    - JPEG: draft mode → decoder tự giảm 1/2, 1/4, 1/8 về gần kích thước đích (nhanh, ít RAM)
+    - xoay theo EXIF Orientation (ảnh chụp điện thoại)
+    - TIFF nhiều trang: mỗi frame 1 trang, seek lần lượt (không nạp cả file)
+    - trang vượt max_pixels (sau draft) → ValueError("image_too_large")
+    """
+    from PIL import Image, ImageOps
+    im = Image.open(io.BytesIO(data))
+    n_frames = min(getattr(im, "n_frames", 1), max_pages)
+    for i in range(n_frames):
+        if i:
+            im.seek(i)
+        if im.format == "JPEG":
+            im.draft("L", _fit_size(im.size, max_side))
+        w, h = im.size
+        if w * h > max_pixels:
+            raise ValueError("image_too_large")
+        page = ImageOps.exif_transpose(im)  # luôn trả bản sao → an toàn khi seek frame kế
+        if page.mode != "L":
+            page = page.convert("L")
+        if max(page.size) > max_side:
+            page = page.resize(_fit_size(page.size, max_side), Image.LANCZOS)
+        yield page
+
+
+def _extract_pdf(data: bytes, ocr_langs: str) -> Tuple[str, str]:
+    """Thử lấy text layer bằng pdfminer; nếu rỗng → raster từng trang bằng pdfium rồi OCR."""
+    from pdfminer.high_level import extract_text as pdf_extract_text
+    with stage("pdf_text"):
+        text = pdf_extract_text(io.BytesIO(data)) or ""
+    if text.strip():
+        return text, "pdf_text"
+    # OCR từng trang
+    return _ocr_pages(_pdf_pages(data), ocr_langs), "pdf_ocr"
+
+
+def _extract_image(data: bytes, ocr_langs: str) -> Tuple[str, str]:
+    return _ocr_pages(iter_image_pages(data), ocr_langs), "image_ocr"
+
+
+def _extract_docx(data: bytes, ocr_langs: str) -> Tuple[str, str]:
+    with stage("docx_text"):
+        return extract_docx_text(data), "docx_text"
+
+
+# Bảng dispatch theo loại file (detect_kind); thêm định dạng mới = thêm 1 dòng
+EXTRACTORS = {
+    "pdf": _extract_pdf,
+    "image": _extract_image,
+    "docx": _extract_docx,
+}
 
 
 def extract_text_bytes(data: bytes, mime: str, ocr_langs: str = "eng") -> Tuple[str, str]:
-    """Trả về (text, mode). mode in {"pdf_text","pdf_ocr","image_ocr"}
+    """Trả về (text, mode). mode in {"pdf_text","pdf_ocr","image_ocr","docx_text","unsupported"}
     - PDF: thử lấy text layer bằng pdfminer; nếu rỗng → raster từng trang bằng pdfium rồi OCR.
     - Ảnh: OCR trực tiếp.
+    - DOCX: đọc thẳng word/document.xml.
+    - .doc (Word 97-2003) / định dạng lạ: không hỗ trợ → ("", "unsupported").
     """
-    ext = mime_to_ext(mime)
-    if ext == "pdf":
-        text = pdf_extract_text(io.BytesIO(data)) or ""
-        if text.strip():
-            return text, "pdf_text"
-        # OCR từng trang
-        text_pages = []
-        pdf = pdfium.PdfDocument(data)
-        for page_index in range(len(pdf)):
-            page = pdf.get_page(page_index)
-            bitmap = page.render(scale=2.0).to_pil()
-            txt = pytesseract.image_to_string(bitmap, lang=ocr_langs)
-            if txt:
-                text_pages.append(txt)
-        return "\n".join(text_pages), "pdf_ocr"
-    else:
-        im = Image.open(io.BytesIO(data))
-        txt = pytesseract.image_to_string(im, lang=ocr_langs)
-        return txt, "image_ocr"
\ No newline at end of file
+    fn = EXTRACTORS.get(detect_kind(data, mime))
+    if fn is None:
+        return "", "unsupported"
+    return fn(data, ocr_langs)
@@ -1,129 +1,364 @@
-import os, json
+import os, json, re, hashlib, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from pydantic import ValidationError
 from .schema import ParseResult
 from app.utils.common import (
     heuristic_extract_basic, split_sections_vi, parse_about_vi,
     parse_skills_vi, parse_projects_vi, parse_experiences_vi,
     parse_education_vi, guess_location_vi, extract_all_links
 )
+from app.utils.sections import Section
+from app.utils.skills import canonicalize_skills
+from app.utils.ratelimit import get_scheduler, estimate_tokens
+from app.utils.metrics import stage
 
 # Lấy cấu hình từ .env
 OPENAI_KEY = os.getenv("OPENAI_API_KEY", "")
 MODEL = os.getenv("OPENAI_MODEL", "openai/gpt-4o-mini")
 LIMIT_MS = int(os.getenv("LLM_TIME_LIMIT_MS", "15000"))
 BASE_URL = os.getenv("OPENAI_BASE_URL")  # <-- thêm base_url cho Haimaker
+PARSER_VERSION = "v1"
 
-PROMPT = (
-    "Bạn là bộ trích xuất CV. Hãy CHỈ trả về JSON đúng theo schema dưới đây.\n"
-    "- Nếu thiếu dữ liệu, để null hoặc mảng rỗng.\n"
-    "- Chuẩn hoá ngày về YYYY hoặc YYYY-MM.\n"
-    "- Lấy tất cả liên kết (LinkedIn, GitHub, Facebook, portfolio/demo) nếu có.\n"
-    "Schema:\n"
+SCHEMA = (
     "{\n  \"candidate\": {\n    \"full_name\": null, \"email\": null, \"phone\": null, \"location\": null, "
     "\"headline\": null, \"summary\": null, \"links\": {\"linkedin\":null,\"github\":null,\"facebook\":null,"
     "\"portfolio_demo_movie\":null}, \"skills\": [], \"languages\": [], \"quality_score\": 0.0\n  },\n"
     "  \"experiences\": [],\n  \"education\": [],\n  \"certifications\": [],\n  \"projects\": []\n}\n"
+)
+
+RULES = (
+    "- Nếu thiếu dữ liệu, để null hoặc mảng rỗng.\n"
+    "- Chuẩn hoá ngày về YYYY hoặc YYYY-MM.\n"
+    "- Lấy tất cả liên kết (LinkedIn, GitHub, Facebook, portfolio/demo) nếu có.\n"
+)
+
+PROMPT = (
+    "Bạn là bộ trích xuất CV. Hãy CHỈ trả về JSON đúng theo schema dưới đây.\n"
+    + RULES +
+    "Schema:\n"
+    + SCHEMA +
     "Văn bản CV:\n"
 )
 
-def llm_parse(text: str) -> dict:
+# Prompt gộp nhiều CV vào 1 request (chế độ backlog) — schema chỉ gửi 1 lần
+BATCH_PROMPT = (
+    "Bạn là bộ trích xuất CV. Bên dưới có NHIỀU CV, mỗi CV bắt đầu bằng dòng \"### CV <id>\".\n"
+    "Hãy CHỈ trả về JSON dạng {\"results\": [...]}: mỗi CV đúng 1 phần tử, theo schema dưới đây "
+    "và thêm khoá \"doc_id\" là <id> tương ứng.\n"
+    + RULES +
+    "Schema mỗi phần tử:\n"
+    + SCHEMA +
+    "Danh sách CV:\n"
+)
+
+# File chứa luật heuristic — sửa nội dung là fingerprint đổi, re-parse tự nhận ra (không cần nhớ bump version)
+HEURISTIC_SOURCES = ("parsers.py", "schema.py", "utils/common.py", "utils/sections.py",
+                     "utils/contacts.py", "utils/skills.py", "data/skills.json")
+
+
+@lru_cache(maxsize=1)
+def parse_fingerprint() -> str:
     """
-    Gọi LLM qua API Haimaker (OpenAI-compatible) nếu có key.
-    Nếu không có key -> fallback heuristic (regex) miễn phí.
+    Định danh mọi thứ quyết định output của llm_parse với cùng 1 text:
+    PARSER_VERSION + (model + prompt khi có key LLM | nội dung HEURISTIC_SOURCES khi chạy heuristic).
+    VD "v1-heuristic-3f9a0c1d2e4b"; 2 lần parse cùng text + cùng fingerprint → cùng kết quả (trừ LLM ngẫu nhiên).
     """
-    if not OPENAI_KEY:
-        # 1) Bóc các phần chính theo heading tiếng Việt
-        sections = split_sections_vi(text)
-
-        # 2) Khởi tạo kết quả
-        pr = ParseResult()
-
-        # 3) Thông tin cơ bản
-        base = heuristic_extract_basic(text)
-        pr.candidate.full_name = base.get("full_name")
-        pr.candidate.email = base.get("email")
-        pr.candidate.phone = base.get("phone")
-        pr.candidate.location = guess_location_vi(text)
-        pr.candidate.links = extract_all_links(text)
-
-        # 4) About me -> headline + summary
-        hl, sm = parse_about_vi(
-            sections.get("giới thiệu bản thân") or sections.get("gioi thieu ban than") or sections.get(
-                "about me") or "")
-        pr.candidate.headline = hl
-        pr.candidate.summary = sm
-
-        # 5) Skills
-        pr.candidate.skills = parse_skills_vi(
-            sections.get("kỹ năng") or sections.get("ky nang") or sections.get("skills") or "")
-
-        # 6) Education
-        pr.education = parse_education_vi(
-            sections.get("học vấn") or sections.get("hoc van") or sections.get("education") or "")
-
-        # 7) Projects
-        pr.projects = parse_projects_vi(
-            sections.get("dự án") or sections.get("du an") or sections.get("personal projects") or sections.get(
-                "projects") or "")
-
-        # 8) Experiences (gộp các mục liên quan)
-        exp_sections = [
-            sections.get("thực tập") or sections.get("thuc tap") or "",
-            sections.get("tham gia dự án") or sections.get("tham gia du an") or "",
-            sections.get("kinh nghiệm") or sections.get("kinh nghiem") or sections.get("work experience") or ""
-        ]
-        pr.experiences = parse_experiences_vi(exp_sections)
-
-        # 9) languages
-        langs_sec = sections.get("ngôn ngữ") or sections.get("ngon ngu") or sections.get("languages") or ""
-        if langs_sec:
-            langs = []
-            for ln in langs_sec.splitlines():
-                s = ln.strip()
-                if not s:
-                    continue
-                # gom câu ngắn
-                s = s.strip("•*- ").strip()
-                if s:
-                    langs.append(s)
-            # unique
-            seen = set();
-            langs_uniq = []
-            for l in langs:
-                k = l.lower()
-                if k not in seen:
-                    langs_uniq.append(l);
-                    seen.add(k)
-            pr.candidate.languages = langs_uniq
-
-        # 10) raw_text + quality
-        pr.raw_text = text
-        score = 0.3
-        if pr.candidate.email or pr.candidate.phone: score += 0.3
-        if pr.candidate.full_name: score += 0.15
-        if pr.candidate.skills: score += 0.15
-        if pr.experiences or pr.projects or pr.education: score += 0.1
-        pr.candidate.quality_score = min(score, 0.98)
-
-        return pr.model_dump()
+    h = hashlib.sha256(PARSER_VERSION.encode())
+    if OPENAI_KEY:
+        h.update("\0".join((MODEL, PROMPT, BATCH_PROMPT)).encode("utf-8"))
+    else:
+        base = os.path.dirname(os.path.abspath(__file__))
+        for rel in HEURISTIC_SOURCES:
+            with open(os.path.join(base, rel), "rb") as f:
+                h.update(f.read())
+    return f"{PARSER_VERSION}-{'llm' if OPENAI_KEY else 'heuristic'}-{h.hexdigest()[:12]}"
 
-    # --- Gọi Haimaker (OpenAI-compatible) ---
+
+# Cấu hình micro-batch
+BATCH_MAX_DOCS = int(os.getenv("LLM_BATCH_MAX_DOCS", "4"))
+BATCH_MAX_CHARS = int(os.getenv("LLM_BATCH_MAX_CHARS", "40000"))
+BATCH_DOC_CHARS = int(os.getenv("LLM_BATCH_DOC_CHARS", "12000"))
+BATCH_DEADLINE_MS = int(os.getenv("LLM_BATCH_DEADLINE_MS", "2000"))
+
+@lru_cache(maxsize=1)
+def _openai_client():
+    """1 client dùng chung (giữ connection pool keep-alive); import openai lần đầu cần tới."""
     from openai import OpenAI
-    client_kwargs = {"api_key": OPENAI_KEY}
+    # max_retries=0: SDK mặc định tự retry 429/5xx 2 lần → scheduler không thấy throttle (AIMD không lùi)
+    # và 1 lượt call() thành tới 3 request thật. Chỉ vòng retry của LLMScheduler.call được retry.
+    client_kwargs = {"api_key": OPENAI_KEY, "max_retries": 0}
     if BASE_URL:  # ví dụ https://api.haimaker.io/v1
         client_kwargs["base_url"] = BASE_URL
+    return OpenAI(**client_kwargs)
+
+def heuristic_parse(text: str) -> dict:
+    """
+    Parse CV bằng heuristic (regex) — miễn phí, không gọi mạng.
+    Dùng khi không có key LLM, và cho xử lý hàng loạt (app/batch.py).
+    Dựng thẳng dict đúng shape ParseResult (dữ liệu do chính code tạo → không cần
+    validate/dump qua pydantic).
+    """
+    # 1) Bóc các phần chính theo heading tiếng Việt
+    sections = split_sections_vi(text)
+
+    # 2) Thông tin cơ bản
+    base = heuristic_extract_basic(text)
+
+    # 3) About me -> headline + summary
+    hl, sm = parse_about_vi(sections.get(Section.ABOUT, ""))
+
+    # 4) Skills / Education / Projects
+    skills = parse_skills_vi(sections.get(Section.SKILLS, ""))
+    education = parse_education_vi(sections.get(Section.EDUCATION, ""))
+    projects = parse_projects_vi(sections.get(Section.PROJECTS, ""))
+
+    # 5) Experiences (gộp các mục liên quan)
+    experiences = parse_experiences_vi([
+        sections.get(Section.INTERNSHIP, ""),
+        sections.get(Section.PROJECT_PARTICIPATION, ""),
+        sections.get(Section.EXPERIENCE, "")
+    ])
+
+    # 6) languages
+    langs_uniq, seen = [], set()
+    for ln in sections.get(Section.LANGUAGES, "").splitlines():
+        # gom câu ngắn
+        l = ln.strip().strip("•*- ").strip()
+        k = l.lower()
+        if l and k not in seen:
+            langs_uniq.append(l)
+            seen.add(k)
 
-    client = OpenAI(**client_kwargs)
+    # 7) quality
+    score = 0.3
+    if base.get("email") or base.get("phone"): score += 0.3
+    if base.get("full_name"): score += 0.15
+    if skills: score += 0.15
+    if experiences or projects or education: score += 0.1
+
+    return {
+        "ok": True,
+        "candidate": {
+            "full_name": base.get("full_name"),
+            "email": base.get("email"),
+            "phone": base.get("phone"),
+            "location": guess_location_vi(text),
+            "headline": hl,
+            "summary": sm,
+            "links": base.get("link_map") or extract_all_links(text),
+            "skills": skills,
+            "languages": langs_uniq,
+            "quality_score": min(score, 0.98),
+        },
+        "experiences": experiences,
+        "education": education,
+        "certifications": [],
+        "projects": projects,
+        "raw_text": text,
+        "parser_version": PARSER_VERSION,
+    }
+
+def llm_parse(text: str, priority: str = "interactive") -> dict:
+    """
+    Gọi LLM qua API Haimaker (OpenAI-compatible) nếu có key.
+    Nếu không có key -> fallback heuristic (regex) miễn phí.
+    priority: "interactive" | "backlog" — làn ưu tiên trong scheduler gọi LLM.
+    """
+    if not OPENAI_KEY:
+        with stage("heuristic_parse"):
+            return heuristic_parse(text)
+
+    # --- Gọi Haimaker (OpenAI-compatible) ---
+    client = _openai_client()
 
     msg = PROMPT + text[:60_000]  # giới hạn prompt
-    resp = client.chat.completions.create(
-        model=MODEL,                   # ví dụ: "openai/gpt-4o-mini"
-        messages=[{"role": "user", "content": msg}],
-        temperature=0.1,
-        timeout=LIMIT_MS/1000.0,
-        response_format={"type": "json_object"}
+    resp = get_scheduler("openai").call(
+        lambda: client.chat.completions.create(
+            model=MODEL,                   # ví dụ: "openai/gpt-4o-mini"
+            messages=[{"role": "user", "content": msg}],
+            temperature=0.1,
+            timeout=LIMIT_MS/1000.0,
+            response_format={"type": "json_object"}
+        ),
+        priority=priority,
+        tokens=estimate_tokens(msg),
     )
     content = resp.choices[0].message.content
-    data = json.loads(content)
-    pr = ParseResult(**data)
+    # validate 1 lần, thẳng từ chuỗi JSON của LLM (không json.loads + ParseResult(**data))
+    pr = ParseResult.model_validate_json(content)
+    pr.candidate.skills = canonicalize_skills(pr.candidate.skills)
     pr.raw_text = text
     return pr.model_dump()
+
+
+# ===== Micro-batch: nhiều CV / 1 request LLM (chỉ cho xử lý backlog) =====
+_WS = re.compile(r"[ \t\u00a0]+")
+
+def compact_text(text: str, limit: int = BATCH_DOC_CHARS) -> str:
+    """Gộp khoảng trắng, bỏ dòng trống, cắt theo limit — giảm token khi gửi LLM."""
+    lines = (_WS.sub(" ", ln).strip() for ln in (text or "").splitlines())
+    return "\n".join(ln for ln in lines if ln)[:limit]
+
+def _pack(compacted: List[str], max_docs: int, max_chars: int) -> List[List[int]]:
+    """Chia index thành các nhóm <= max_docs CV và <= max_chars ký tự (giữ thứ tự)."""
+    groups, cur, size = [], [], 0
+    for i, c in enumerate(compacted):
+        if cur and (len(cur) >= max_docs or size + len(c) > max_chars):
+            groups.append(cur)
+            cur, size = [], 0
+        cur.append(i)
+        size += len(c)
+    if cur:
+        groups.append(cur)
+    return groups
+
+def _llm_parse_batch(texts: List[str], compacted: List[str], priority: str) -> Dict[int, dict]:
+    """
+    Gửi 1 request cho cả nhóm; trả {vị trí trong nhóm: kết quả}.
+    Phần tử nào thiếu/sai schema sẽ không có trong dict → caller gọi lẻ.
+    """
+    msg = BATCH_PROMPT + "".join(f"### CV {i}\n{c}\n" for i, c in enumerate(compacted))
+    client = _openai_client()
+    try:
+        resp = get_scheduler("openai").call(
+            lambda: client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": msg}],
+                temperature=0.1,
+                timeout=LIMIT_MS / 1000.0 * 2,
+                response_format={"type": "json_object"}
+            ),
+            priority=priority,
+            tokens=estimate_tokens(msg) + 1024 * (len(texts) - 1),
+        )
+        data = json.loads(resp.choices[0].message.content)
+    except Exception as e:
+        print(f"[llm_parse_batch] batch {len(texts)} CV lỗi, chuyển sang gọi lẻ: {e}")
+        return {}
+
+    out: Dict[int, dict] = {}
+    items = data.get("results") if isinstance(data, dict) else None
+    for item in items or []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            idx = int(item.pop("doc_id"))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not 0 <= idx < len(texts) or idx in out:
+            continue
+        try:
+            pr = ParseResult.model_validate(item)
+        except ValidationError:
+            continue
+        pr.candidate.skills = canonicalize_skills(pr.candidate.skills)
+        pr.raw_text = texts[idx]
+        out[idx] = pr.model_dump()
+    return out
+
+def llm_parse_many(texts: Iterable[str], priority: str = "backlog",
+                   max_docs: int = BATCH_MAX_DOCS, max_chars: int = BATCH_MAX_CHARS,
+                   return_exceptions: bool = False) -> List[Union[dict, Exception]]:
+    """
+    Parse nhiều CV, gộp tối đa max_docs CV (đã compact) vào 1 request LLM.
+    Kết quả trả theo đúng thứ tự đầu vào; CV nào batch không trả về hợp lệ → llm_parse lẻ.
+    Không có key → heuristic từng CV như llm_parse.
+    return_exceptions=True: CV gọi lẻ lỗi (provider, ValidationError...) → exception nằm ở vị trí của CV đó,
+    các CV khác vẫn có kết quả (như asyncio.gather); False → raise ngay.
+    """
+    texts = list(texts)
+
+    def one(i: int) -> Union[dict, Exception]:
+        try:
+            return llm_parse(texts[i], priority=priority)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            print(f"[llm_parse_many] CV {i} lỗi: {e}")
+            return e
+
+    if not OPENAI_KEY:
+        return [one(i) for i in range(len(texts))]
+    compacted = [compact_text(t) for t in texts]
+    results: List[Union[dict, Exception, None]] = [None] * len(texts)
+    for group in _pack(compacted, max_docs, max_chars):
+        got = {}
+        if len(group) > 1:
+            got = _llm_parse_batch([texts[i] for i in group], [compacted[i] for i in group], priority)
+        for j, i in enumerate(group):
+            results[i] = got.get(j) or one(i)
+    return results
+
+
+class MicroBatcher:
+    """
+    Gom các CV submit() lẻ thành batch; flush khi đủ max_docs / max_chars
+    hoặc khi CV đầu tiên trong batch đã chờ quá deadline_ms.
+        mb = MicroBatcher()
+        fut = mb.submit(text)   # Future -> dict như llm_parse
+        mb.close()
+    """
+
+    def __init__(self, max_docs: int = BATCH_MAX_DOCS, max_chars: int = BATCH_MAX_CHARS,
+                 deadline_ms: int = BATCH_DEADLINE_MS, priority: str = "backlog", workers: int = 2):
+        self.max_docs = max_docs
+        self.max_chars = max_chars
+        self.deadline_s = deadline_ms / 1000.0
+        self.priority = priority
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, Future]] = []
+        self._chars = 0
+        self._timer: Optional[threading.Timer] = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-batch")
+
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        size = min(len(text or ""), BATCH_DOC_CHARS)
+        with self._lock:
+            self._pending.append((text, fut))
+            self._chars += size
+            if len(self._pending) >= self.max_docs or self._chars >= self.max_chars:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.deadline_s, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._pool.submit(self._run, batch)
+        return fut
+
+    def _take(self) -> List[Tuple[str, Future]]:
+        batch, self._pending, self._chars = self._pending, [], 0
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _run(self, batch: List[Tuple[str, Future]]) -> None:
+        try:
+            results = llm_parse_many([t for t, _ in batch], priority=self.priority,
+                                     max_docs=self.max_docs, max_chars=self.max_chars, return_exceptions=True)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        # chỉ CV lỗi mới nhận exception; CV batch đã parse đúng vẫn có kết quả
+        for (_, fut), r in zip(batch, results):
+            if isinstance(r, Exception):
+                fut.set_exception(r)
+            else:
+                fut.set_result(r)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._pool.submit(self._run, batch)
+
+    def close(self) -> None:
+        self.flush()
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,72 @@
+# ===== Quét email / số điện thoại / URL trong 1 lượt =====
+# Thay 3 lần re.findall riêng (email, phone, links) + URL_RE trong extract_all_links.
+# Mỗi nhánh chỉ được bắt đầu ở đầu "từ" (lookbehind) và dùng lượng từ possessive,
+# nên không backtrack trên các chuỗi số dài (bảng điểm, OCR nhiễu) → thời gian tuyến tính.
+
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+from app.utils.pdf import norm_phone
+
+CONTACT_RE = re.compile(
+    r"(?P<url>(?<![\w/])https?://[^\s)]++)"
+    r"|(?P<email>(?<![A-Za-z0-9_.+-])[A-Za-z0-9_.+-]++@[A-Za-z0-9-]++\.[A-Za-z0-9.-]++)"
+    r"|(?P<phone>(?<![\w+])(?:\(?\+\d{1,3}\)?[ \t.\-]?+|84|\(?0)\d{2,}+(?:\)?+[ \t.\-]{0,2}+\d{2,}+)*+(?!\d))"
+)
+# Nhánh phone bắt buộc dạng số điện thoại: mở đầu bằng mã nước (+84, (+84), +65...), 84 hoặc 0 (đầu số / mã vùng (028)),
+# các nhóm sau phân cách mỗi nhóm >= 2 chữ số. Dãy năm / khoảng thời gian ("2016-2020 2021", "1998 - 2002") không mở đầu
+# bằng +, 84, 0 nên không khớp; ngày tháng ("01.02.2020", "05/2019") không đủ PHONE_MIN_DIGITS.
+
+# Số điện thoại hợp lệ sau khi bỏ ký tự phân cách: 9..12 chữ số (VN: 10 số, +84 → 11 số)
+PHONE_MIN_DIGITS = 9
+PHONE_MAX_DIGITS = 12
+
+
+def _clean_link(u: str) -> str:
+    # bỏ dấu chấm/ký tự thừa cuối link
+    return u.rstrip(').,];:')
+
+
+def classify_link(u: str) -> Optional[str]:
+    """Trả khoá trong links dict (linkedin/github/facebook/portfolio_demo_movie) hoặc None."""
+    low = u.lower()
+    if 'linkedin.com' in low:
+        return "linkedin"
+    if 'github.com' in low:
+        return "github"
+    if 'facebook.com' in low:
+        return "facebook"
+    if 'vercel.app' in low or 'portfolio' in low or 'movie' in low:
+        return "portfolio_demo_movie"
+    return None
+
+
+class Contacts(NamedTuple):
+    emails: List[str]
+    phones: List[str]            # đã chuẩn hoá theo norm_phone (+84...)
+    urls: List[str]
+    links: Dict[str, Optional[str]]  # như extract_all_links
+
+
+def scan_contacts(text: str) -> Contacts:
+    emails: List[str] = []
+    phones: List[str] = []
+    urls: List[str] = []
+    links: Dict[str, Optional[str]] = {"linkedin": None, "github": None, "facebook": None,
+                                       "portfolio_demo_movie": None}
+    for m in CONTACT_RE.finditer(text or ""):
+        kind = m.lastgroup
+        if kind == "url":
+            u = _clean_link(m.group())
+            urls.append(u)
+            k = classify_link(u)
+            if k:
+                links[k] = u  # giữ hành vi cũ: link sau ghi đè link trước
+        elif kind == "email":
+            emails.append(m.group().rstrip('.-'))
+        else:
+            p = norm_phone(m.group())
+            digits = len(p) - p.startswith("+")
+            if PHONE_MIN_DIGITS <= digits <= PHONE_MAX_DIGITS:
+                phones.append(p)
+    return Contacts(emails, phones, urls, links)
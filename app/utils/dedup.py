@@ -0,0 +1,233 @@
+# ===== Phát hiện CV trùng / gần trùng trước khi chạy các bước đắt (OCR, LLM) =====
+# 3 loại khoá, tra theo thứ tự:
+#   exact  cùng content hash (cùng file)            → tra trước cả extract
+#   text   text giống hệt (chỉ khác khoảng trắng)   → cùng CV, file khác (export lại, gửi qua kênh khác)
+#   near   MinHash/LSH trên text đã extract          → CV gửi lại, sửa vài dòng
+#   email / phone  norm_email / norm_phone khớp     → cùng ứng viên, CV khác (ứng tuyển nhiều vị trí)
+# exact / text (hoặc near ≥ DEDUP_REUSE_THRESHOLD nếu đặt < 1, cùng email + phone) → dùng lại kết quả parse trước,
+# không gọi LLM; khớp khác → vẫn parse, trả kèm diff với lần parse trước. Index nằm trong RAM từng process
+# (như RAW_TEXTS).
+#
+# MinHash dạng one-permutation hashing (1 hash / shingle, chia SIG_SIZE ngăn, lấy min mỗi ngăn,
+# ngăn rỗng mượn ngăn kế bên) → O(số shingle) thay vì O(số shingle × SIG_SIZE), không cần numpy.
+# LSH: BANDS dải × ROWS hàng → cặp có Jaccard ≈ (1/BANDS)^(1/ROWS) ≈ 0.77 trở lên gần như chắc chắn thành ứng viên.
+
+import hashlib
+import os
+import re
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.utils.contacts import scan_contacts
+from app.utils.pdf import norm_email
+from app.utils.sections import fold
+
+DEDUP_MODE = os.getenv("DEDUP_MODE", "reuse")  # reuse | report | off
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))              # Jaccard ước lượng để báo "near"
+# near ≥ ngưỡng này → dùng lại kết quả cũ; 1.0 = tắt (chỉ dùng lại khi text giống hệt — sửa 1 dòng kỹ năng vẫn ~0.95)
+DEDUP_REUSE_THRESHOLD = float(os.getenv("DEDUP_REUSE_THRESHOLD", "1.0"))
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "100000"))
+DEDUP_RESULT_CACHE = int(os.getenv("DEDUP_RESULT_CACHE", "5000"))        # số kết quả parse giữ để dùng lại / diff
+
+SIG_SIZE = 64
+BANDS, ROWS = 8, 8
+SHINGLE = 3  # số từ / shingle
+_MASK64 = (1 << 64) - 1
+_VALUE_BITS = 58  # 6 bit cao chọn ngăn (SIG_SIZE = 64)
+_EMPTY = (1 << 32) - 1
+_WORD = re.compile(r"\w+")
+
+
+class Sketch(NamedTuple):
+    """Những gì cần để tra index — tính từ text, rẻ (~0.1ms / CV), gửi được qua process."""
+    sig: bytes       # MinHash
+    text_key: str    # hash của text gộp khoảng trắng (giữ nguyên dấu, hoa / thường)
+    email: str
+    phone: str
+
+
+def sketch(text: str) -> Sketch:
+    words = _WORD.findall(fold(text))
+    email, phone = contact_keys(text)
+    return Sketch(minhash(words), hashlib.sha1(" ".join(text.split()).encode()).hexdigest(), email, phone)
+
+
+def minhash(words: List[str]) -> bytes:
+    """Chữ ký SIG_SIZE × uint32 (bytes) của tập shingle SHINGLE-từ liên tiếp."""
+    if len(words) < SHINGLE:
+        words = words + [""] * (SHINGLE - len(words))
+    mins = [_EMPTY] * SIG_SIZE
+    for i in range(len(words) - SHINGLE + 1):
+        # crc32 ổn định giữa các process (khác hash() của Python); nhân hằng Fibonacci để trộn đều bit cao
+        h = (zlib.crc32(" ".join(words[i:i + SHINGLE]).encode()) * 0x9E3779B97F4A7C15) & _MASK64
+        b = h >> _VALUE_BITS
+        v = (h >> 26) & 0xFFFFFFFE  # 31 bit, bit thấp = 0 → không bao giờ trùng _EMPTY
+        if v < mins[b]:
+            mins[b] = v
+    if _EMPTY in mins and any(m != _EMPTY for m in mins):
+        # densification: ngăn rỗng lấy giá trị ngăn không rỗng kế tiếp (vòng tròn), đánh dấu bằng bit thấp
+        for b in range(SIG_SIZE):
+            if mins[b] == _EMPTY:
+                j = (b + 1) % SIG_SIZE
+                while mins[j] == _EMPTY or mins[j] & 1:
+                    j = (j + 1) % SIG_SIZE
+                mins[b] = mins[j] | 1
+    return array("I", mins).tobytes()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Jaccard ước lượng = tỉ lệ ngăn bằng nhau."""
+    x, y = memoryview(a).cast("I"), memoryview(b).cast("I")
+    return sum(1 for i in range(SIG_SIZE) if x[i] == y[i]) / SIG_SIZE
+
+
+def contact_keys(text: str) -> Tuple[str, str]:
+    """(email, phone) đầu tiên trong text, đã chuẩn hoá — thường nằm ở phần đầu CV của chính ứng viên."""
+    c = scan_contacts(text)
+    return (norm_email(c.emails[0]) if c.emails else ""), (c.phones[0] if c.phones else "")
+
+
+class Entry(NamedTuple):
+    digest: str
+    sketch: Optional[Sketch]
+    label: Optional[str]  # VD source trong ingest
+
+
+class DedupIndex:
+    def __init__(self, max_entries: int = DEDUP_MAX_ENTRIES, max_results: int = DEDUP_RESULT_CACHE,
+                 threshold: float = DEDUP_THRESHOLD, reuse_threshold: float = DEDUP_REUSE_THRESHOLD):
+        self.max_entries = max_entries
+        self.max_results = max_results
+        self.threshold = threshold
+        self.reuse_threshold = reuse_threshold
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        # (digest, fingerprint) → result: cùng file parse bởi nhiều parser (LLM / Gemini) giữ riêng từng kết quả
+        self._results: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        # khoá phụ → digest đầu tiên có khoá đó
+        self._keys: Dict[str, Dict[str, str]] = {"text": {}, "email": {}, "phone": {}}
+        self._bands: List[Dict[bytes, List[str]]] = [{} for _ in range(BANDS)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _band_keys(sig: bytes) -> List[bytes]:
+        step = ROWS * 4
+        return [sig[i * step:(i + 1) * step] for i in range(BANDS)]
+
+    @staticmethod
+    def _secondary(sk: Sketch) -> Dict[str, str]:
+        return {"text": sk.text_key, "email": sk.email, "phone": sk.phone}
+
+    def add(self, digest: str, sk: Optional[Sketch] = None, label: Optional[str] = None,
+            result: Optional[dict] = None, fingerprint: str = "") -> None:
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+            else:
+                self._entries[digest] = Entry(digest, sk, label)
+                if sk is not None:
+                    for kind, value in self._secondary(sk).items():
+                        if value:
+                            self._keys[kind].setdefault(value, digest)
+                    for band, key in zip(self._bands, self._band_keys(sk.sig)):
+                        band.setdefault(key, []).append(digest)
+                while len(self._entries) > self.max_entries:
+                    self._evict(self._entries.popitem(last=False)[1])
+            if result is not None:
+                self._results[(digest, fingerprint)] = result
+                self._results.move_to_end((digest, fingerprint))
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+
+    def _evict(self, e: Entry) -> None:
+        # kết quả của digest bị loại tự rơi khỏi _results theo LRU (max_results)
+        if e.sketch is None:
+            return
+        for kind, value in self._secondary(e.sketch).items():
+            if value and self._keys[kind].get(value) == e.digest:
+                del self._keys[kind][value]
+        for band, key in zip(self._bands, self._band_keys(e.sketch.sig)):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.remove(e.digest)
+                if not bucket:
+                    del band[key]
+
+    def result(self, digest: str, fingerprint: str) -> Optional[dict]:
+        """Kết quả parse đã lưu của digest nếu parse cùng fingerprint (cùng prompt / luật)."""
+        with self._lock:
+            return self._results.get((digest, fingerprint))
+
+    def lookup(self, digest: str, sk: Optional[Sketch] = None) -> Optional[Dict[str, Any]]:
+        """
+        Khớp tốt nhất: exact > text > near (similarity cao nhất) > email > phone. None nếu không khớp.
+        sk=None → chỉ tra content hash (trước khi extract).
+        {"match", "content_hash", "similarity", "same_contacts", "label"}
+        """
+        with self._lock:
+            e = self._entries.get(digest)
+            if e is not None:
+                return {"match": "exact", "content_hash": digest, "similarity": 1.0, "same_contacts": True,
+                        "label": e.label}
+            if sk is None:
+                return None
+            kind, best, best_sim = "text", None, 0.0
+            d = self._keys["text"].get(sk.text_key)
+            if d is not None:
+                best, best_sim = self._entries[d], 1.0
+            else:
+                kind, seen = "near", set()
+                for band, key in zip(self._bands, self._band_keys(sk.sig)):
+                    for d in band.get(key, ()):
+                        if d not in seen:
+                            seen.add(d)
+                            cand = self._entries[d]
+                            sim = similarity(sk.sig, cand.sketch.sig)
+                            if sim > best_sim:
+                                best, best_sim = cand, sim
+                if best is None or best_sim < self.threshold:
+                    best = None
+                    for kind in ("email", "phone"):
+                        d = getattr(sk, kind) and self._keys[kind].get(getattr(sk, kind))
+                        if d:
+                            best = self._entries[d]
+                            best_sim = similarity(sk.sig, best.sketch.sig)
+                            break
+            if best is None:
+                return None
+            same = (best.sketch.email, best.sketch.phone) == (sk.email, sk.phone)
+        return {"match": kind, "content_hash": best.digest, "similarity": round(best_sim, 3),
+                "same_contacts": same, "label": best.label}
+
+    def reusable(self, match: Optional[Dict[str, Any]]) -> bool:
+        """Đủ giống để dùng lại kết quả parse cũ thay vì parse lại."""
+        if match is None:
+            return False
+        if match["match"] in ("exact", "text"):
+            return True
+        return (match["match"] == "near" and self.reuse_threshold < 1.0
+                and match["similarity"] >= self.reuse_threshold and match["same_contacts"])
+
+
+_CANDIDATE_FIELDS = ("full_name", "email", "phone", "location", "headline")
+
+
+def diff_results(old: dict, new: dict) -> Dict[str, Any]:
+    """Khác biệt chính giữa 2 kết quả parse: trường candidate đổi giá trị, kỹ năng thêm / bớt, số kinh nghiệm."""
+    oc, nc = old.get("candidate") or {}, new.get("candidate") or {}
+    changed = {f: [oc.get(f), nc.get(f)] for f in _CANDIDATE_FIELDS if oc.get(f) != nc.get(f)}
+    os_, ns = set(oc.get("skills") or []), set(nc.get("skills") or [])
+    out: Dict[str, Any] = {"changed": changed,
+                           "skills_added": sorted(ns - os_), "skills_removed": sorted(os_ - ns)}
+    ne, oe = len(new.get("experiences") or []), len(old.get("experiences") or [])
+    if ne != oe:
+        out["experiences"] = [oe, ne]
+    return out
+
+
+DEDUP = DedupIndex()
@@ -0,0 +1,82 @@
+# ===== Đọc text DOCX trực tiếp từ word/document.xml (không OCR, không LLM) =====
+# Parse XML tăng dần (iterparse) ngay trên stream trong zip, gỡ phần tử đã đọc khỏi cây → RAM ổn định với file lớn.
+
+import io
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+T, TAB, BR, CR, P, TC, TR, TBL, R = (W + "t", W + "tab", W + "br", W + "cr", W + "p", W + "tc", W + "tr",
+                                     W + "tbl", W + "r")
+# mc:AlternateContent: mc:Choice (VD text box dạng DrawingML) và mc:Fallback (VML) chứa cùng nội dung → chỉ đọc Choice
+FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+# Chặn zip bomb: document.xml giải nén tối đa bao nhiêu byte
+MAX_XML_BYTES = 64 * 1024 * 1024
+
+
+def is_docx(data: bytes) -> bool:
+    if not data.startswith(b"PK\x03\x04"):
+        return False
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            zf.getinfo("word/document.xml")
+        return True
+    except (zipfile.BadZipFile, KeyError):
+        return False
+
+
+def extract_docx_text(data: bytes) -> str:
+    """
+    Text theo thứ tự đọc: mỗi đoạn (w:p) 1 dòng, w:tab trong run → tab (w:tab trong w:pPr/w:tabs là định nghĩa
+    tab stop, bỏ qua), w:br/w:cr → xuống dòng, ô bảng → tab. Nội dung dưới mc:Fallback bị bỏ (trùng mc:Choice).
+    """
+    out = []
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        info = zf.getinfo("word/document.xml")
+        if info.file_size > MAX_XML_BYTES:
+            raise ValueError("docx_too_large")
+        with zf.open(info) as fh:
+            # stack = các phần tử đang mở; el.clear() chỉ xoá con của el, el vẫn treo trên cha
+            # (w:body giữ mọi w:p đã đọc) → gỡ hẳn khỏi cha khi đọc xong đoạn / ô / hàng / bảng
+            stack = []
+            fallback = 0  # số mc:Fallback đang mở
+            for event, el in iterparse(fh, events=("start", "end")):
+                if event == "start":
+                    stack.append(el)
+                    if el.tag == FALLBACK:
+                        fallback += 1
+                    continue
+                stack.pop()
+                tag = el.tag
+                if tag == FALLBACK:
+                    fallback -= 1
+                elif fallback:
+                    continue  # phần tử con của Fallback được gỡ cùng Fallback
+                elif tag == T:
+                    if el.text:
+                        out.append(el.text)
+                    continue
+                elif tag == TAB:
+                    if stack and stack[-1].tag == R:
+                        out.append("\t")
+                    continue
+                elif tag == BR or tag == CR:
+                    out.append("\n")
+                    continue
+                elif tag == P:
+                    out.append("\n")
+                elif tag == TC:
+                    if out and out[-1] == "\n":
+                        out[-1] = "\t"  # các ô cùng hàng trên 1 dòng
+                elif tag == TR:
+                    if out and out[-1] == "\t":
+                        out[-1] = "\n"
+                    else:
+                        out.append("\n")
+                elif tag != TBL:
+                    continue
+                el.clear()
+                if stack:
+                    stack[-1].remove(el)
+    return "".join(out)
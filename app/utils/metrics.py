@@ -0,0 +1,151 @@
+# ===== Đo thời gian theo stage + counter, xuất Prometheus text (/metrics) và header Server-Timing =====
+# Chi phí mỗi lần đo: 2 lần perf_counter + 1 lock ngắn → không đáng kể so với pdfminer/tesseract/LLM.
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Giây; phủ từ regex (ms) tới OCR/LLM (chục giây)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_: str):
+        self.name, self.help = name, help_
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0) + amount
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for k, v in sorted(self._values.items()):
+                out.append(f"{self.name}{_fmt_labels(k)} {v:g}")
+        return out
+
+
+class Gauge:
+    def __init__(self, name: str, help_: str):
+        self.name, self.help = name, help_
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for k, v in sorted(self._values.items()):
+                out.append(f"{self.name}{_fmt_labels(k)} {v:.6f}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help_: str, buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help_
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, list] = {}  # [counts per bucket..., +Inf], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        k = _key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(k)
+            if s is None:
+                s = self._series[k] = [[0] * (len(self.buckets) + 1), 0.0]
+            s[0][i] += 1
+            s[1] += value
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for k, (counts, total) in sorted(self._series.items()):
+                acc = 0
+                for le, c in zip(self.buckets, counts):
+                    acc += c
+                    labels = _fmt_labels(k, 'le="%g"' % le)
+                    out.append(f"{self.name}_bucket{labels} {acc}")
+                acc += counts[-1]
+                labels = _fmt_labels(k, 'le="+Inf"')
+                out.append(f"{self.name}_bucket{labels} {acc}")
+                out.append(f"{self.name}_sum{_fmt_labels(k)} {total:.6f}")
+                out.append(f"{self.name}_count{_fmt_labels(k)} {acc}")
+        return out
+
+
+STAGE_SECONDS = Histogram("resume_stage_seconds", "Thời gian từng stage (extract, ocr, http, llm...)")
+REQUEST_SECONDS = Histogram("resume_request_seconds", "Thời gian xử lý request theo endpoint")
+REQUESTS = Counter("resume_requests_total", "Số request theo endpoint và status")
+CACHE = Counter("resume_cache_total", "Tra cache theo kết quả hit/miss")
+OCR_PAGES = Counter("resume_ocr_pages_total", "Số trang đã OCR")
+LLM_TOKENS = Counter("resume_llm_tokens_total", "Token LLM đã dùng theo provider")
+BYTES_DOWNLOADED = Counter("resume_bytes_downloaded_total", "Số byte tải về theo nguồn")
+STARTUP_SECONDS = Gauge("resume_startup_seconds", "Thời gian khởi động theo phase (import, warmup, ready...)")
+
+REGISTRY = [STAGE_SECONDS, REQUEST_SECONDS, REQUESTS, CACHE, OCR_PAGES, LLM_TOKENS, BYTES_DOWNLOADED,
+            STARTUP_SECONDS]
+
+# Thời gian các stage của request hiện tại (cho Server-Timing); None khi ngoài request
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("resume_timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """with stage("pdf_text"): ... → histogram resume_stage_seconds{stage=...} + Server-Timing."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        STAGE_SECONDS.observe(dt, stage=name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, dt))
+
+
+def begin_request() -> List[Tuple[str, float]]:
+    timings: List[Tuple[str, float]] = []
+    _timings.set(timings)
+    return timings
+
+
+def server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    """Gộp các stage trùng tên (VD nhiều trang ocr_page) → 'ocr_page;dur=812.3;desc="x3", total;dur=...'."""
+    agg: Dict[str, List[float]] = {}
+    for name, dt in timings:
+        a = agg.setdefault(name, [0.0, 0])
+        a[0] += dt
+        a[1] += 1
+    parts = [f'{n};dur={d * 1000:.1f}' + (f';desc="x{c}"' if c > 1 else "") for n, (d, c) in agg.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for m in REGISTRY:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
@@ -6,11 +6,32 @@ from typing import Any, Dict, List
 
 import requests
 
+from app.utils.metrics import stage, BYTES_DOWNLOADED
+
 
 def resolve_model_name() -> str:
     name = (os.getenv("GEMINI_MODEL_NAME") or "").strip()
     return name if name else "gemini-2.5-pro"
 
+# VD http://127.0.0.1:9100 — gọi Gemini qua REST tới endpoint khác (server giả lập khi load test)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+
+# retry=None: tắt retry mặc định của google-api-core (503/429...) — chỉ LLMScheduler.call retry, để AIMD thấy throttle
+GEMINI_REQUEST_OPTIONS = {"retry": None}
+
+def gemini_client(api_key: str):
+    """
+    Import google.generativeai khi thật sự cần (import ~250ms, kéo theo cả grpc/protobuf)
+    rồi configure key/endpoint. Import lặp lại chỉ là tra sys.modules.
+    """
+    import google.generativeai as genai
+    if GEMINI_API_ENDPOINT:
+        genai.configure(api_key=api_key, transport="rest",
+                        client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+    else:
+        genai.configure(api_key=api_key)
+    return genai
+
 # ===== Chuẩn hoá text/JSON =====
 def coerce_str(x: Any) -> str:
     return (x or "").strip() if isinstance(x, str) else ("" if x is None else str(x).strip())
@@ -40,12 +61,7 @@ def json_coerce(s: str) -> Dict[str, Any] | List[Any] | None:
             return None
 
 # ===== Kỹ năng → chuỗi hoặc list =====
-def to_skills_str(sk: Any) -> str:
-    if not sk:
-        return ""
-    if isinstance(sk, list):
-        return ", ".join([coerce_str(x) for x in sk if coerce_str(x)])
-    return coerce_str(sk)
+from app.utils.skills import to_skills_str  # noqa: E402,F401
 
 # ===== Chuẩn hoá email/phone/location =====
 def norm_email(s: str) -> str:
@@ -68,89 +84,13 @@ def clean_location(s: str) -> str:
     return s
 
 # ===== Tách vị trí ứng tuyển từ subject =====
-import re
-import unicodedata
-
-def normalize_text(s: str) -> str:
-    """Chuẩn hóa text: bỏ dấu, lower, bỏ ký tự thừa."""
-    s = s or ""
-    s = s.lower().strip()
-    s = ''.join(c for c in unicodedata.normalize('NFD', s)
-                if unicodedata.category(c) != 'Mn')  # bỏ dấu tiếng Việt
-    return s
-
-def extract_position(subject: str) -> str:
-    """
-    Trích ra vị trí tuyển dụng từ subject email.
-    Bao quát chữ hoa, chữ thường, có dấu và các bộ phận phổ biến.
-    """
-    raw = subject or ""
-    norm = normalize_text(raw)
-
-    # Bộ từ khóa mapping (không dấu)
-    POSITIONS = {
-        "backend": "Backend Developer",
-        "front end": "Frontend Developer",
-        "frontend": "Frontend Developer",
-        "fullstack": "Fullstack Developer",
-        "mobile": "Mobile Developer",
-        "ios": "iOS Developer",
-        "android": "Android Developer",
-        "flutter": "Flutter Developer",
-        "react": "React Developer",
-        "node": "NodeJS Developer",
-        "golang": "Golang Developer",
-        "python": "Python Developer",
-        "java": "Java Developer",
-        "php": "PHP Developer",
-        "devops": "DevOps Engineer",
-        "data": "Data Engineer",
-        "machine learning": "Machine Learning Engineer",
-        "ai": "AI Engineer",
-        "qa": "QA/QC Tester",
-        "tester": "QA/QC Tester",
-        "test": "QA/QC Tester",
-        "designer": "UI/UX Designer",
-        "ui ux": "UI/UX Designer",
-        "product": "Product Manager",
-        "project": "Project Manager",
-        "pm": "Project Manager",
-        "hr": "HR Executive",
-        "human resource": "HR Executive",
-        "accountant": "Accountant",
-        "ke toan": "Accountant",
-        "marketing": "Marketing Executive",
-        "sale": "Sales Executive",
-        "sales": "Sales Executive",
-        "customer service": "Customer Service",
-        "support": "Customer Support",
-        "business analyst": "Business Analyst",
-        "ba": "Business Analyst",
-        "intern": "Intern",
-        "thuc tap": "Intern",
-        "content": "Content Writer",
-        "copywriter": "Copywriter",
-        "operation": "Operation Executive",
-        "it helpdesk": "IT Helpdesk",
-        "system admin": "System Administrator",
-        "security": "Security Engineer",
-        "network": "Network Engineer",
-        "r&d": "R&D Engineer",
-    }
-
-    # Duyệt tìm keyword khớp trong chuỗi
-    for kw, title in POSITIONS.items():
-        if re.search(rf"\b{re.escape(kw)}\b", norm):
-            return title
-
-    # fallback: thử khớp các pattern chung
-    if re.search(r"developer|engineer|programmer", norm):
-        return "Software Engineer"
-
-    return "Nằm ngoài tuyển dụng"
+from app.utils.position import extract_position, classify_positions  # noqa: E402,F401
 
 
 # ===== Google Drive helpers =====
+# Ghi đè được để trỏ về server giả lập khi load test (bench/stubs.py)
+DRIVE_BASE_URL = os.getenv("DRIVE_BASE_URL", "https://drive.google.com").rstrip("/")
+
 def extract_drive_file_id(url: str) -> str:
     """
     Nhận link kiểu:
@@ -168,13 +108,15 @@ def extract_drive_file_id(url: str) -> str:
 
 def download_drive_file(file_id: str) -> bytes:
     """Tải file từ Google Drive không xác thực (chia sẻ công khai)."""
-    u = f"https://drive.google.com/uc?export=download&id={file_id}"
-    r = requests.get(u, timeout=30)
-    r.raise_for_status()
+    u = drive_direct_url(file_id)
+    with stage("drive_download"):
+        r = requests.get(u, timeout=30)
+        r.raise_for_status()
+    BYTES_DOWNLOADED.inc(len(r.content), source="drive")
     return r.content
 
 def drive_direct_url(file_id: str) -> str:
-    return f"https://drive.google.com/uc?export=download&id={file_id}"
+    return f"{DRIVE_BASE_URL}/uc?export=download&id={file_id}"
 
 # ===== Tiện ích cắt text gửi LLM =====
 MAX_CHARS = int(os.getenv("GEMINI_MAX_CHARS", "12000"))
@@ -182,37 +124,217 @@ def truncate_text(s: str, max_len: int = MAX_CHARS) -> str:
     s = coerce_str(s)
     return s if len(s) <= max_len else s[:max_len] + "\n...[TRUNCATED]"
 
-def extract_text_bytes(file_bytes: bytes, mime_type: str, lang: str = "eng") -> tuple[str, str]:
+# ===== Payload ảnh gọn cho PDF scan gửi Gemini =====
+IMG_DPI = int(os.getenv("GEMINI_IMG_DPI", "110"))
+IMG_FORMAT = (os.getenv("GEMINI_IMG_FORMAT", "jpeg") or "jpeg").lower()  # jpeg | webp
+IMG_QUALITY = int(os.getenv("GEMINI_IMG_QUALITY", "60"))
+IMG_MAX_PAGES = int(os.getenv("GEMINI_IMG_MAX_PAGES", "4"))
+PAYLOAD_BUDGET = int(os.getenv("GEMINI_PAYLOAD_BUDGET", "1500000"))  # bytes
+IMG_MAX_SIDE = int(os.getenv("GEMINI_IMG_MAX_SIDE", "1600"))  # cạnh dài tối đa khi gửi file ảnh
+MIN_IMG_QUALITY = 30
+MIN_IMG_DPI = 60
+
+
+def _is_blank_page(gray) -> bool:
+    lo, hi = gray.getextrema()
+    return hi - lo < 16
+
+
+def _encode_page(gray, fmt: str, quality: int) -> bytes:
+    from io import BytesIO
+    buf = BytesIO()
+    if fmt == "webp":
+        gray.save(buf, format="WEBP", quality=quality, method=4)
+    else:
+        gray.save(buf, format="JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def _fit_budget(grays: list, fmt: str, quality: int, budget: int, min_scale: float) -> tuple[list, int, float, int]:
+    """Nén các trang xám: giảm quality rồi thu nhỏ (tới min_scale) cho tới khi tổng <= budget → (blobs, total, scale, quality)."""
+    scale, q = 1.0, quality
+    while True:
+        pages = [g if scale >= 1 else g.resize((max(1, int(g.width * scale)), max(1, int(g.height * scale))))
+                 for g in grays]
+        blobs, total = [], 0
+        for g in pages:
+            b = _encode_page(g, fmt, q)
+            if blobs and total + len(b) > budget:
+                break  # giữ trong budget: bỏ các trang sau
+            blobs.append(b)
+            total += len(b)
+        if total <= budget and len(blobs) == len(pages):
+            break
+        if q > MIN_IMG_QUALITY:
+            q = max(MIN_IMG_QUALITY, q - 15)
+        elif scale > min_scale:
+            scale = max(min_scale, scale * 0.75)
+        else:
+            break  # đã tối thiểu → gửi những trang vừa budget
+    return blobs, total, scale, q
+
+
+def build_image_payload(pdf_bytes: bytes,
+                        dpi: int = IMG_DPI,
+                        fmt: str = IMG_FORMAT,
+                        quality: int = IMG_QUALITY,
+                        max_pages: int = IMG_MAX_PAGES,
+                        budget: int = PAYLOAD_BUDGET) -> tuple[list, dict]:
     """
-    Trích xuất text từ PDF hoặc ảnh.
-    Trả về tuple (text, kind):
-    - text: nội dung văn bản trích được
-    - kind: "text" nếu là PDF có text, "image" nếu OCR, "unknown" nếu lỗi
+    Render các trang đầu (bỏ trang trắng) thành ảnh xám JPEG/WebP ở `dpi`,
+    giảm quality rồi giảm DPI cho tới khi tổng dung lượng <= `budget`.
+    Trả về (parts, info):
+    - parts: list blob {"mime_type", "data"} để gửi kèm prompt
+    - info: {"kind","pages","bytes","original_bytes","dpi","quality","format"}
+    Lỗi render → fallback blob PDF gốc. Chỉ dùng cho PDF thật (ảnh → build_photo_payload).
+    """
+    fmt = "webp" if fmt == "webp" else "jpeg"
+    mime = f"image/{fmt}"
+    original = len(pdf_bytes)
+    try:
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        # render 1 lần ở DPI gốc, các lần hạ DPI chỉ resize ảnh đã có
+        grays = []
+        for i in range(min(len(pdf), max_pages)):
+            g = pdf[i].render(scale=dpi / 72.0, grayscale=True).to_pil().convert("L")
+            if not _is_blank_page(g):
+                grays.append(g)
+        pdf.close()
+    except Exception as e:
+        print("[build_image_payload] render failed:", e)
+        grays = []
+
+    if not grays:
+        return ([{"mime_type": "application/pdf", "data": pdf_bytes}],
+                {"kind": "pdf", "pages": None, "bytes": original, "original_bytes": original})
+
+    blobs, total, scale, q = _fit_budget(grays, fmt, quality, budget, MIN_IMG_DPI / dpi)
+    parts = [{"mime_type": mime, "data": b} for b in blobs]
+    return parts, {"kind": "images", "pages": len(blobs), "bytes": total, "original_bytes": original,
+                   "dpi": int(dpi * scale), "quality": q, "format": fmt}
+
+
+# Ảnh Gemini nhận nguyên trạng khi không decode / thu nhỏ được (TIFF, BMP thì không)
+GEMINI_IMAGE_MIMES = {"image/png", "image/jpeg", "image/webp"}
+_IMAGE_MAGIC = ((b"\x89PNG", "image/png"), (b"\xff\xd8", "image/jpeg"), (b"RIFF", "image/webp"))
+
+
+def build_photo_payload(img_bytes: bytes,
+                        mime_type: str = "",
+                        fmt: str = IMG_FORMAT,
+                        quality: int = IMG_QUALITY,
+                        max_pages: int = IMG_MAX_PAGES,
+                        budget: int = PAYLOAD_BUDGET,
+                        max_side: int = IMG_MAX_SIDE) -> tuple[list, dict]:
+    """
+    Như build_image_payload cho file ảnh (JPEG/PNG/TIFF nhiều trang...): decode từng frame qua
+    app.ocr.iter_image_pages (draft JPEG, xoay EXIF, xám, cạnh dài <= max_side) rồi nén trong `budget`.
+    Không decode được → gửi ảnh gốc với MIME thật nếu Gemini nhận định dạng đó, không thì parts rỗng.
+    Ảnh vượt OCR_MAX_PIXELS → ValueError("image_too_large").
+    info: {"kind","pages","bytes","original_bytes","max_side","quality","format"}
+    """
+    from app.ocr import iter_image_pages
+    fmt = "webp" if fmt == "webp" else "jpeg"
+    original = len(img_bytes)
+    try:
+        grays = [g for g in iter_image_pages(img_bytes, max_side=max_side, max_pages=max_pages)
+                 if not _is_blank_page(g)]
+    except Exception as e:
+        if str(e) == "image_too_large":
+            raise
+        print("[build_photo_payload] decode failed:", e)
+        grays = []
+
+    if not grays:
+        mime = next((m for magic, m in _IMAGE_MAGIC if img_bytes.startswith(magic)), (mime_type or "").lower())
+        if mime not in GEMINI_IMAGE_MIMES:
+            return [], {"kind": "image", "pages": 0, "bytes": 0, "original_bytes": original}
+        return ([{"mime_type": mime, "data": img_bytes}],
+                {"kind": "image", "pages": 1, "bytes": original, "original_bytes": original})
+
+    blobs, total, scale, q = _fit_budget(grays, fmt, quality, budget, MIN_IMG_DPI / IMG_DPI)
+    parts = [{"mime_type": f"image/{fmt}", "data": b} for b in blobs]
+    return parts, {"kind": "images", "pages": len(blobs), "bytes": total, "original_bytes": original,
+                   "max_side": int(max(max(g.size) for g in grays) * min(scale, 1.0)), "quality": q, "format": fmt}
+
+
+# Đổi logic extract (ngưỡng, số trang OCR, thư viện...) → tăng version: text artifact cũ bị coi là cũ
+EXTRACTOR_VERSION = "x5"
+
+_PAGE_BREAK = re.compile(r"(?<=\f)")
+
+
+def extract_text_pages(file_bytes: bytes, mime_type: str, lang: str = "eng",
+                       ocr: bool = True) -> tuple[list[tuple[str, str]], str]:
+    """
+    Như extract_text_bytes nhưng giữ từng trang: trả ([(text trang, mode trang)], kind).
+    mode trang: "text" (text layer / DOCX), "empty" (trang PDF không có text layer), "ocr", "unknown".
+    "".join(text các trang).strip() == text của extract_text_bytes.
+    ocr=False: chỉ đọc text layer / DOCX; ảnh và PDF scan trả ([], "image") thay vì OCR.
     """
     from io import BytesIO
+    from app.ocr import detect_kind, extract_text_bytes as extract_any, iter_image_pages, ocr_page_texts
+
+    file_kind = detect_kind(file_bytes, mime_type)
+    # 0️⃣ Ảnh → OCR từng trang (TIFF nhiều trang: mỗi frame 1 trang)
+    if file_kind == "image":
+        if not ocr:
+            return [], "image"
+        try:
+            return [(t + "\n", "ocr") for t in ocr_page_texts(iter_image_pages(file_bytes), lang or "eng")], "image"
+        except Exception as e:
+            if str(e) == "image_too_large":
+                raise  # vượt OCR_MAX_PIXELS → endpoint trả 413 (như MAX_BYTES), không phải "text rỗng"
+            print("[extract_text_bytes] OCR failed:", e)
+            return [], "unknown"
+
+    # 0️⃣ Không phải PDF (DOCX...) → bảng dispatch trong app/ocr.py
+    if file_kind != "pdf":
+        try:
+            text, mode = extract_any(file_bytes, mime_type, lang or "eng")
+        except Exception as e:
+            print("[extract_text_bytes] extract failed:", e)
+            return [], "unknown"
+        if mode == "docx_text":
+            return [(text, "text")], "text"
+        return [(text, "unknown")], "unknown"
+
     from pdfminer.high_level import extract_text
-    from pdf2image import convert_from_bytes
-    import pytesseract
 
     # 1️⃣ Thử đọc PDF bằng pdfminer (đọc text thật)
     text = ""
     try:
-        text = extract_text(BytesIO(file_bytes), maxpages=1)
+        with stage("pdf_text"):
+            text = extract_text(BytesIO(file_bytes), maxpages=1)
     except Exception:
         pass
 
     if text and len(text.strip()) > 50:
-        # Có text → PDF dạng text
-        full_text = extract_text(BytesIO(file_bytes))
-        return full_text.strip(), "text"
+        # Có text → PDF dạng text; pdfminer kết thúc mỗi trang bằng \f
+        with stage("pdf_text"):
+            full_text = extract_text(BytesIO(file_bytes))
+        pages = [p for p in _PAGE_BREAK.split(full_text) if p]
+        return [(p, "text" if p.strip() else "empty") for p in pages], "text"
 
-    # 2️⃣ Không có text → PDF scan → OCR
+    # 2️⃣ Không có text → PDF scan → render pdfium + OCR từng trang qua app/ocr.py (cùng pipeline, OCR_MAX_PAGES, metrics)
+    if not ocr:
+        return [], "image"
     try:
-        images = convert_from_bytes(file_bytes)
-        ocr_text = ""
-        for img in images[:3]:  # chỉ đọc 3 trang đầu cho nhanh
-            ocr_text += pytesseract.image_to_string(img, lang=lang or "eng")
-        return ocr_text.strip(), "image"
+        from app.ocr import ocr_page_texts, _pdf_pages
+        pages = [(t + "\n", "ocr") for t in ocr_page_texts(_pdf_pages(file_bytes), lang or "eng")]
+        return pages, "image"
     except Exception as e:
         print("[extract_text_bytes] OCR failed:", e)
-        return "", "unknown"
\ No newline at end of file
+        return [], "unknown"
+
+
+def extract_text_bytes(file_bytes: bytes, mime_type: str, lang: str = "eng") -> tuple[str, str]:
+    """
+    Trích xuất text từ PDF hoặc ảnh.
+    Trả về tuple (text, kind):
+    - text: nội dung văn bản trích được
+    - kind: "text" nếu là PDF có text hoặc DOCX, "image" nếu OCR, "unknown" nếu lỗi/không hỗ trợ
+    """
+    pages, kind = extract_text_pages(file_bytes, mime_type, lang)
+    return "".join(t for t, _ in pages).strip(), kind
@@ -0,0 +1,113 @@
+# ===== Phân loại vị trí ứng tuyển từ subject email =====
+# Build 1 lần lúc import: 1 regex alternation cho toàn bộ keyword + LRU cache theo subject đã chuẩn hoá.
+
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+from app.utils.sections import fold
+
+# Thứ tự = độ ưu tiên: nhiều keyword cùng khớp thì keyword đứng trước thắng
+POSITIONS = {
+    "backend": "Backend Developer",
+    "front end": "Frontend Developer",
+    "frontend": "Frontend Developer",
+    "fullstack": "Fullstack Developer",
+    "mobile": "Mobile Developer",
+    "ios": "iOS Developer",
+    "android": "Android Developer",
+    "flutter": "Flutter Developer",
+    "react": "React Developer",
+    "node": "NodeJS Developer",
+    "golang": "Golang Developer",
+    "python": "Python Developer",
+    "java": "Java Developer",
+    "php": "PHP Developer",
+    "devops": "DevOps Engineer",
+    "data": "Data Engineer",
+    "machine learning": "Machine Learning Engineer",
+    "ai": "AI Engineer",
+    "qa": "QA/QC Tester",
+    "tester": "QA/QC Tester",
+    "test": "QA/QC Tester",
+    "designer": "UI/UX Designer",
+    "ui ux": "UI/UX Designer",
+    "product": "Product Manager",
+    "project": "Project Manager",
+    "pm": "Project Manager",
+    "hr": "HR Executive",
+    "human resource": "HR Executive",
+    "accountant": "Accountant",
+    "ke toan": "Accountant",
+    "marketing": "Marketing Executive",
+    "sale": "Sales Executive",
+    "sales": "Sales Executive",
+    "customer service": "Customer Service",
+    "support": "Customer Support",
+    "business analyst": "Business Analyst",
+    "ba": "Business Analyst",
+    "intern": "Intern",
+    "thuc tap": "Intern",
+    "content": "Content Writer",
+    "copywriter": "Copywriter",
+    "operation": "Operation Executive",
+    "it helpdesk": "IT Helpdesk",
+    "system admin": "System Administrator",
+    "security": "Security Engineer",
+    "network": "Network Engineer",
+    "r&d": "R&D Engineer",
+}
+OUT_OF_SCOPE = "Nằm ngoài tuyển dụng"
+MEMO_SIZE = 4096
+
+_PRIORITY = {kw: i for i, kw in enumerate(POSITIONS)}
+# Keyword dài trước để "front end" không bị "frontend"/"test" che; ranh giới từ như \b cũ
+POSITION_RE = re.compile(
+    r"(?<!\w)(?:" + "|".join(re.escape(kw) for kw in sorted(POSITIONS, key=len, reverse=True)) + r")(?!\w)"
+)
+GENERIC_RE = re.compile(r"developer|engineer|programmer")
+# Phần sau "vị trí"/"position" mô tả vị trí → ưu tiên hơn phần còn lại (thường là tên ứng viên)
+SLOT_RE = re.compile(r"(?:vi tri|position|ung tuyen)\s*:?\s*([^\-–—,/|]+)")
+
+
+def _best(s: str) -> str:
+    best = None
+    for m in POSITION_RE.finditer(s):
+        kw = m.group()
+        if best is None or _PRIORITY[kw] < _PRIORITY[best]:
+            best = kw
+            if _PRIORITY[kw] == 0:
+                break
+    return POSITIONS[best] if best else ""
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _classify(norm: str) -> str:
+    for m in SLOT_RE.finditer(norm):
+        title = _best(m.group(1))
+        if title:
+            return title
+    title = _best(norm)
+    if title:
+        return title
+    if GENERIC_RE.search(norm):
+        return "Software Engineer"
+    return OUT_OF_SCOPE
+
+
+def normalize_subject(subject: str) -> str:
+    """Bỏ dấu, lower, gộp khoảng trắng — khoá cho memo."""
+    return " ".join(fold(subject).split())
+
+
+def extract_position(subject: str) -> str:
+    """
+    Trích ra vị trí tuyển dụng từ subject email.
+    'Ứng tuyển vị trí Backend - Trần Văn Đạt' => 'Backend Developer'
+    """
+    return _classify(normalize_subject(subject))
+
+
+def classify_positions(subjects: Iterable[str]) -> List[str]:
+    """Phân loại hàng loạt; subject trùng nhau chỉ tính 1 lần nhờ memo."""
+    return [_classify(normalize_subject(s)) for s in subjects]
@@ -0,0 +1,116 @@
+# ===== Profile 1 request cụ thể (cProfile) — bật bằng header admin token hoặc lấy mẫu theo tỉ lệ =====
+# Middleware đánh dấu request (contextvar) → hàm được bọc @profiled chạy dưới cProfile ngay trong
+# thread xử lý (endpoint sync chạy trong threadpool nên phải profile tại đó, không phải ở event loop).
+# Kết quả lưu PROFILE_DIR/<profile_id>.prof (pstats) + .txt (top hàm theo cumulative), có giới hạn lưu trữ.
+# profile_id = X-Request-ID của client + hậu tố uuid (retry dùng lại id không ghi đè nhau); id client ghi trong .txt.
+
+import cProfile
+import functools
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/resume-profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_MAX_AGE_S = int(os.getenv("PROFILE_MAX_AGE_S", str(7 * 24 * 3600)))
+PROFILE_TOP_N = 60
+
+PROFILE_HEADER = "x-profile-token"
+_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# {"id": profile_id, "request_id": X-Request-ID | None, "active": bool, "saved": bool} khi request hiện tại được profile
+_profile: ContextVar[Optional[Dict[str, Any]]] = ContextVar("resume_profile", default=None)
+
+
+def check_admin_token(token: Optional[str]) -> bool:
+    return bool(PROFILE_ADMIN_TOKEN) and hmac.compare_digest(token or "", PROFILE_ADMIN_TOKEN)
+
+
+def begin_request(headers) -> Optional[Dict[str, Any]]:
+    """Gọi ở middleware: quyết định có profile request này không, trả state (hoặc None)."""
+    forced = check_admin_token(headers.get(PROFILE_HEADER))
+    if not forced and not (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE):
+        return None
+    rid = headers.get("x-request-id") or ""
+    suffix = uuid.uuid4().hex[:12]
+    # tên file luôn có hậu tố uuid; phần id client cắt ngắn để tổng vẫn khớp _ID_RE
+    pid = f"{rid[:48]}-{suffix}" if _ID_RE.match(rid) else uuid.uuid4().hex
+    state = {"id": pid, "request_id": rid or None, "active": False, "saved": False}
+    _profile.set(state)
+    return state
+
+
+def profiled(fn):
+    """Bọc hàm sync nặng (endpoint / pipeline); chỉ lớp ngoài cùng chạy cProfile."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        state = _profile.get()
+        if state is None or state["active"]:
+            return fn(*args, **kwargs)
+        state["active"] = True
+        prof = cProfile.Profile()
+        try:
+            return prof.runcall(fn, *args, **kwargs)
+        finally:
+            state["active"] = False
+            try:
+                _save(prof, state["id"], state.get("request_id"), fn.__qualname__)
+                state["saved"] = True
+            except Exception as e:
+                print(f"[profiling] lưu profile {state['id']} lỗi: {e}")
+    return wrapper
+
+
+def _save(prof: cProfile.Profile, pid: str, rid: Optional[str], label: str) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, pid)
+    prof.dump_stats(base + ".prof")
+    buf = io.StringIO()
+    buf.write(f"# profile_id={pid} request_id={rid!r} fn={label} at={time.strftime('%Y-%m-%dT%H:%M:%S')}\n")
+    pstats.Stats(prof, stream=buf).strip_dirs().sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(buf.getvalue())
+    _prune()
+
+
+def _prune() -> None:
+    """Giữ tối đa PROFILE_MAX_FILES profile, xoá cái cũ hơn PROFILE_MAX_AGE_S."""
+    items = list_profiles()
+    now = time.time()
+    for i, it in enumerate(items):
+        if i >= PROFILE_MAX_FILES or now - it["mtime"] > PROFILE_MAX_AGE_S:
+            for ext in (".prof", ".txt"):
+                try:
+                    os.remove(os.path.join(PROFILE_DIR, it["id"] + ext))
+                except FileNotFoundError:
+                    pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Mới nhất trước."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    out = []
+    for name in os.listdir(PROFILE_DIR):
+        if name.endswith(".prof"):
+            p = os.path.join(PROFILE_DIR, name)
+            st = os.stat(p)
+            out.append({"id": name[:-5], "mtime": st.st_mtime, "bytes": st.st_size})
+    out.sort(key=lambda x: x["mtime"], reverse=True)
+    return out
+
+
+def profile_path(rid: str, ext: str) -> Optional[str]:
+    if not _ID_RE.match(rid or ""):
+        return None
+    p = os.path.join(PROFILE_DIR, rid + ext)
+    return p if os.path.isfile(p) else None
@@ -0,0 +1,256 @@
+# ===== Bộ điều phối lệnh gọi LLM ra ngoài (OpenAI-compatible / Gemini) =====
+# - Token bucket theo số request/giây và theo số token/phút
+# - AIMD: gặp 429 hoặc latency vượt ngưỡng → giảm nhân; thành công → tăng cộng
+# - 2 làn ưu tiên: "interactive" (request của người dùng) và "backlog" (xử lý tồn)
+# - Hàng đợi có giới hạn: đầy → 503 ngay thay vì dồn thêm lên provider
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.utils.metrics import stage, LLM_TOKENS
+
+PRIORITIES = {"interactive": 0, "backlog": 1}
+
+QUEUE_LIMITS = {
+    "interactive": int(os.getenv("LLM_QUEUE_INTERACTIVE", "32")),
+    "backlog": int(os.getenv("LLM_QUEUE_BACKLOG", "256")),
+}
+QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "30"))
+LATENCY_TARGET_S = int(os.getenv("LLM_LATENCY_TARGET_MS", "20000")) / 1000.0
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+AIMD_DECREASE = 0.5      # gặp 429
+AIMD_SLOWDOWN = 0.9      # latency vượt ngưỡng
+AIMD_INCREASE_FRAC = 0.05  # mỗi lần thành công cộng thêm 5% rps tối đa
+
+
+class TokenBucket:
+    """Token bucket đơn giản; KHÔNG tự khoá — LLMScheduler giữ lock bên ngoài."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.ts = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.ts) * self.rate)
+        self.ts = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Số giây cần chờ để đủ `amount` token (0 nếu đủ ngay)."""
+        self.refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def state(self) -> Dict[str, float]:
+        return {"rate": round(self.rate, 4), "capacity": self.capacity, "tokens": round(self.tokens, 2)}
+
+
+def is_rate_limited(e: Exception) -> bool:
+    """Nhận diện lỗi 429 của openai (RateLimitError) và google (ResourceExhausted)."""
+    if getattr(e, "status_code", None) == 429 or getattr(e, "code", None) == 429:
+        return True
+    # chỉ theo status / kiểu lỗi: chuỗi "429" trong message (id, số token...) không phải throttle
+    return type(e).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+
+def usage_tokens(resp: Any) -> Optional[int]:
+    """Lấy tổng token thực tế từ response openai (usage) hoặc gemini (usage_metadata)."""
+    usage = getattr(resp, "usage", None)
+    if usage is not None and getattr(usage, "total_tokens", None):
+        return int(usage.total_tokens)
+    meta = getattr(resp, "usage_metadata", None)
+    if meta is not None and getattr(meta, "total_token_count", None):
+        return int(meta.total_token_count)
+    return None
+
+
+def estimate_tokens(*parts: Any) -> int:
+    """Ước lượng thô: ~4 ký tự / token, cộng dư cho phần output JSON."""
+    n = sum(len(p) for p in parts if isinstance(p, str))
+    return n // 4 + 1024
+
+
+class LLMScheduler:
+    def __init__(self, name: str, rps: float, tpm: float = 0, burst: float = 1, min_rps: float = 0.05):
+        self.name = name
+        self.max_rps = float(rps)
+        self.min_rps = min(float(min_rps), self.max_rps)
+        self.rps = float(rps)
+        self.req_bucket = TokenBucket(rps, max(1.0, burst))
+        self.tok_bucket = TokenBucket(tpm / 60.0, tpm) if tpm > 0 else None
+
+        self._cv = threading.Condition()
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._queued = {lane: 0 for lane in PRIORITIES}
+        self.inflight = 0
+        self.latency_ewma: Optional[float] = None
+        self.counters = {"ok": 0, "errors": 0, "throttled": 0, "retries": 0,
+                         "rejected_full": 0, "rejected_timeout": 0, "tokens_used": 0}
+
+    # --- hàng đợi ---
+    def acquire(self, priority: str = "interactive", tokens: int = 0,
+                timeout: float = QUEUE_TIMEOUT_S) -> None:
+        lane = priority if priority in PRIORITIES else "interactive"
+        with self._cv:
+            if self._queued[lane] >= QUEUE_LIMITS[lane]:
+                self.counters["rejected_full"] += 1
+                raise HTTPException(503, f"llm_queue_full: {self.name}/{lane}")
+            entry = [PRIORITIES[lane], next(self._seq)]
+            heapq.heappush(self._heap, entry)
+            self._queued[lane] += 1
+            deadline = time.monotonic() + timeout
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._heap[0] is entry:
+                        wait = self.req_bucket.wait_time(1, now)
+                        if self.tok_bucket is not None:
+                            wait = max(wait, self.tok_bucket.wait_time(tokens, now))
+                        if wait <= 0:
+                            self.req_bucket.take(1)
+                            if self.tok_bucket is not None:
+                                self.tok_bucket.take(tokens)
+                            heapq.heappop(self._heap)
+                            self.inflight += 1
+                            return
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.counters["rejected_timeout"] += 1
+                        raise HTTPException(503, f"llm_queue_timeout: {self.name}/{lane}")
+                    self._cv.wait(remaining if wait is None else min(wait, remaining))
+            except BaseException:
+                if entry in self._heap:
+                    self._heap.remove(entry)
+                    heapq.heapify(self._heap)
+                raise
+            finally:
+                self._queued[lane] -= 1
+                self._cv.notify_all()
+
+    def feedback(self, latency: float, throttled: bool, est_tokens: int = 0,
+                 used_tokens: Optional[int] = None, failed: bool = False) -> None:
+        """
+        AIMD: 429 → giảm một nửa; chậm → giảm nhẹ; nhanh → tăng cộng dần tới max_rps.
+        failed (lỗi khác 429: 5xx, mất kết nối...): chỉ trả slot inflight — lỗi trả về nhanh không được tính là
+        "nhanh" (không tăng rps, không kéo latency_ewma xuống).
+        """
+        with self._cv:
+            now = time.monotonic()
+            self.inflight -= 1
+            if failed and not throttled:
+                self._cv.notify_all()
+                return
+            if throttled:
+                self.counters["throttled"] += 1
+                self.rps = max(self.min_rps, self.rps * AIMD_DECREASE)
+                self.req_bucket.refill(now)
+                self.req_bucket.tokens = min(self.req_bucket.tokens, 0.0)
+            else:
+                a = 0.2
+                self.latency_ewma = latency if self.latency_ewma is None else (
+                    a * latency + (1 - a) * self.latency_ewma)
+                if latency > LATENCY_TARGET_S:
+                    self.rps = max(self.min_rps, self.rps * AIMD_SLOWDOWN)
+                else:
+                    self.rps = min(self.max_rps, self.rps + self.max_rps * AIMD_INCREASE_FRAC)
+            self.req_bucket.refill(now)
+            self.req_bucket.rate = self.rps
+            # trừ/hoàn phần chênh giữa token ước lượng và token thực tế
+            if used_tokens is not None:
+                self.counters["tokens_used"] += used_tokens
+                if self.tok_bucket is not None:
+                    self.tok_bucket.refill(now)
+                    self.tok_bucket.tokens -= used_tokens - est_tokens
+            self._cv.notify_all()
+
+    def call(self, fn: Callable[[], Any], priority: str = "interactive", tokens: int = 0,
+             retries: int = MAX_RETRIES) -> Any:
+        """Chạy `fn` khi tới lượt; 429 từ provider → phản hồi AIMD rồi xếp hàng lại (tối đa `retries`)."""
+        for attempt in range(retries + 1):
+            with stage("llm_queue"):
+                self.acquire(priority, tokens)
+            t0 = time.monotonic()
+            try:
+                with stage(f"llm_{self.name}"):
+                    resp = fn()
+            except Exception as e:
+                throttled = is_rate_limited(e)
+                self.feedback(time.monotonic() - t0, throttled, failed=True)
+                if throttled and attempt < retries:
+                    with self._cv:
+                        self.counters["retries"] += 1
+                    continue
+                with self._cv:
+                    self.counters["errors"] += 1
+                raise
+            used = usage_tokens(resp)
+            if used:
+                LLM_TOKENS.inc(used, provider=self.name)
+            self.feedback(time.monotonic() - t0, False, tokens, used)
+            with self._cv:
+                self.counters["ok"] += 1
+            return resp
+
+    def state(self) -> Dict[str, Any]:
+        with self._cv:
+            now = time.monotonic()
+            self.req_bucket.refill(now)
+            if self.tok_bucket is not None:
+                self.tok_bucket.refill(now)
+            return {
+                "rps": round(self.rps, 4),
+                "max_rps": self.max_rps,
+                "min_rps": self.min_rps,
+                "inflight": self.inflight,
+                "queued": dict(self._queued),
+                "queue_limits": dict(QUEUE_LIMITS),
+                "latency_ewma_s": None if self.latency_ewma is None else round(self.latency_ewma, 3),
+                "requests": self.req_bucket.state(),
+                "tokens": self.tok_bucket.state() if self.tok_bucket is not None else None,
+                **self.counters,
+            }
+
+
+# ===== Registry: mỗi provider một scheduler, cấu hình qua ENV =====
+_SCHEDULERS: Dict[str, LLMScheduler] = {}
+_LOCK = threading.Lock()
+
+
+def get_scheduler(provider: str) -> LLMScheduler:
+    """provider in {"openai","gemini"} → đọc LLM_<PROVIDER>_RPS / _TPM / _BURST."""
+    with _LOCK:
+        sched = _SCHEDULERS.get(provider)
+        if sched is None:
+            p = provider.upper()
+            sched = LLMScheduler(
+                provider,
+                rps=float(os.getenv(f"LLM_{p}_RPS", "2")),
+                tpm=float(os.getenv(f"LLM_{p}_TPM", "0")),
+                burst=float(os.getenv(f"LLM_{p}_BURST", "2")),
+                min_rps=float(os.getenv(f"LLM_{p}_MIN_RPS", "0.05")),
+            )
+            _SCHEDULERS[provider] = sched
+        return sched
+
+
+def schedulers_state() -> Dict[str, Any]:
+    with _LOCK:
+        items = list(_SCHEDULERS.items())
+    return {name: s.state() for name, s in items}
@@ -0,0 +1,79 @@
+# ===== Trả JSON nhanh: serialize 1 lần bằng orjson (nếu có), bỏ qua jsonable_encoder của FastAPI =====
+
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:  # orjson không bắt buộc
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+try:
+    import brotli  # tuỳ chọn: pip install brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+
+def _accepted_encodings(request: Request) -> set:
+    out = set()
+    for part in request.headers.get("accept-encoding", "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            out.add(name)
+    return out
+
+
+def json_response(obj: Any, request: Optional[Request] = None, status_code: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Response JSON đã serialize sẵn — endpoint trả dict thuần (không phải model pydantic).
+    Có `request` và body >= COMPRESS_MIN_BYTES → nén br (nếu cài brotli) hoặc gzip theo Accept-Encoding.
+    """
+    body = dumps(obj)
+    headers = dict(headers or {})
+    if request is not None and len(body) >= COMPRESS_MIN_BYTES:
+        accepted = _accepted_encodings(request)
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def project(obj: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Chỉ giữ các trường được chọn, đường dẫn dạng chấm:
+    project(r, ["candidate.email", "candidate.skills", "education"])
+    """
+    out: Dict[str, Any] = {}
+    for path in fields:
+        parts = [p for p in path.strip().split(".") if p]
+        src, dst = obj, out
+        for i, p in enumerate(parts):
+            if not isinstance(src, dict) or p not in src:
+                break
+            if i == len(parts) - 1:
+                dst[p] = src[p]
+                break
+            if dst.get(p) is src[p]:
+                break  # đã lấy nguyên nhánh cha
+            src, dst = src[p], dst.setdefault(p, {})
+    return out
+
+
+def parse_fields(fields: Optional[str]) -> list:
+    """'candidate.email, skills' → ['candidate.email', 'skills']"""
+    return [f.strip() for f in (fields or "").split(",") if f.strip()]
@@ -0,0 +1,161 @@
+# ===== Tách section CV 1 lượt (heading có dấu / không dấu / tiếng Anh → khoá chuẩn) =====
+
+import re
+import unicodedata
+from enum import Enum
+from typing import Dict, List, NamedTuple, Optional
+
+
+class Section(str, Enum):
+    ABOUT = "about"
+    EDUCATION = "education"
+    PROJECTS = "projects"
+    INTERNSHIP = "internship"
+    PROJECT_PARTICIPATION = "project_participation"
+    EXPERIENCE = "experience"
+    SKILLS = "skills"
+    LANGUAGES = "languages"
+
+
+# Các biến thể heading (đã bỏ dấu, lower). Dòng được coi là heading nếu BẮT ĐẦU bằng
+# 1 biến thể, ngay sau đó là hết dòng hoặc ký tự không phải chữ/số (giống \b cũ), và phần còn lại
+# (bỏ ":" cuối) tối đa MAX_SUFFIX_WORDS từ: "Kinh nghiệm làm việc:" là heading, "Experience with Docker and CI" thì không.
+# Khớp dài nhất thắng: "tham gia du an ..." → PROJECT_PARTICIPATION chứ không phải PROJECTS.
+HEADINGS: Dict[Section, List[str]] = {
+    Section.ABOUT: ["gioi thieu ban than", "about me", "muc tieu nghe nghiep", "career objective"],
+    Section.EDUCATION: ["hoc van", "trinh do hoc van", "education"],
+    Section.PROJECTS: ["du an", "personal projects", "projects"],
+    Section.INTERNSHIP: ["thuc tap", "internship", "internships"],
+    Section.PROJECT_PARTICIPATION: ["tham gia du an"],
+    Section.EXPERIENCE: ["kinh nghiem", "work experience", "experience"],
+    Section.SKILLS: ["ky nang", "skills", "technical skills"],
+    Section.LANGUAGES: ["ngon ngu", "ngoai ngu", "languages"],
+}
+
+_WS_CHARS = " \t\r\f\v\u00a0"
+
+# Dòng dài hơn thế này thì không phải heading (tránh bắt nhầm câu "Skills in ..." trong thân)
+MAX_HEADING_LEN = 60
+# Số từ tối đa sau biến thể ("làm việc", "chuyên môn", "& bằng cấp"...)
+MAX_SUFFIX_WORDS = 2
+_WORD = re.compile(r"\w+")
+
+
+def _build_fold_table() -> Dict[str, str]:
+    """Bảng 1 ký tự → chữ thường không dấu cho dải Latin + Latin Extended Additional (tiếng Việt)."""
+    table: Dict[str, str] = {}
+    for cp in list(range(0x41, 0x250)) + list(range(0x1E00, 0x1F00)):
+        ch = chr(cp)
+        base = "".join(c for c in unicodedata.normalize("NFD", ch.lower())
+                       if unicodedata.category(c) != "Mn")
+        table[ch] = base
+    for cp in range(0x300, 0x370):  # dấu rời (text dạng NFD)
+        table[chr(cp)] = ""
+    table["Đ"] = table["đ"] = "d"
+    return table
+
+
+_FOLD = _build_fold_table()
+_FOLD_TRANS = str.maketrans(_FOLD)
+
+
+def fold(s: str) -> str:
+    """Bỏ dấu + lower bằng 1 lần str.translate (đ → d)."""
+    return (s or "").translate(_FOLD_TRANS).lower()
+
+
+# Trie theo ký tự đã fold; khoá "" đánh dấu kết thúc 1 biến thể
+_TRIE: dict = {}
+for _sec, _variants in HEADINGS.items():
+    for _v in _variants:
+        _node = _TRIE
+        for _ch in _v:
+            _node = _node.setdefault(_ch, {})
+        _node[""] = _sec
+
+
+def match_heading(text: str, start: int = 0, end: Optional[int] = None) -> Optional[Section]:
+    """Khớp heading ở text[start:end] (đã bỏ khoảng trắng đầu); None nếu không phải heading."""
+    end = len(text) if end is None else end
+    if end - start > MAX_HEADING_LEN:
+        return None
+    node, best, best_end, prev_space = _TRIE, None, end, False
+    for k in range(start, end):
+        ch = text[k]
+        if ch.isspace():
+            if prev_space:
+                continue
+            f, prev_space = " ", True
+        else:
+            f = _FOLD.get(ch)
+            if f is None:
+                f = ch.lower()
+            prev_space = False
+            if not f:
+                continue  # dấu rời
+        if "" in node and not f[0].isalnum():
+            best, best_end = node[""], k
+        nxt = node.get(f) if len(f) == 1 else None
+        if nxt is None and len(f) > 1:
+            nxt = node
+            for c in f:
+                nxt = nxt.get(c)
+                if nxt is None:
+                    break
+        if nxt is None:
+            break
+        node = nxt
+    else:
+        if "" in node:
+            best, best_end = node[""], end
+    if best is None or best_end == end:
+        return best
+    suffix = text[best_end:end].rstrip(_WS_CHARS).rstrip(":")
+    return best if len(_WORD.findall(fold(suffix))) <= MAX_SUFFIX_WORDS else None
+
+
+class SectionSpan(NamedTuple):
+    section: Section
+    heading_start: int  # offset dòng heading
+    start: int          # offset đầu thân section (sau dòng heading)
+    end: int            # offset cuối thân section (đầu heading kế tiếp)
+
+
+def section_spans(text: str) -> List[SectionSpan]:
+    """
+    Quét text 1 lượt theo dòng (không splitlines/copy), trả danh sách span offset ký tự.
+    Phần trước heading đầu tiên không thuộc section nào.
+    """
+    spans: List[SectionSpan] = []
+    cur: Optional[Section] = None
+    cur_head = cur_body = 0
+    n, pos = len(text), 0
+    while pos < n:
+        nl = text.find("\n", pos)
+        line_end = n if nl == -1 else nl
+        i = pos
+        while i < line_end and text[i] in _WS_CHARS:
+            i += 1
+        j = line_end
+        while j > i and text[j - 1] in _WS_CHARS:
+            j -= 1
+        sec = match_heading(text, i, j) if i < j else None
+        if sec is not None:
+            if cur is not None:
+                spans.append(SectionSpan(cur, cur_head, cur_body, pos))
+            cur, cur_head, cur_body = sec, pos, min(line_end + 1, n)
+        pos = line_end + 1
+    if cur is not None:
+        spans.append(SectionSpan(cur, cur_head, cur_body, n))
+    return spans
+
+
+def sections_dict(text: str) -> Dict[Section, str]:
+    """Section → thân (strip). Section xuất hiện nhiều lần thì nối các thân bằng dòng trống."""
+    out: Dict[Section, str] = {}
+    for sp in section_spans(text):
+        body = text[sp.start:sp.end].strip()
+        if not body:
+            continue
+        out[sp.section] = out[sp.section] + "\n\n" + body if sp.section in out else body
+    return out
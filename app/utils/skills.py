@@ -0,0 +1,166 @@
+# ===== Chuẩn hoá kỹ năng theo ontology (alias → tên chuẩn + nhóm) =====
+# Ontology JSON: {"Node.js": {"category": "backend", "aliases": [...], "exact": [...]}}
+# - aliases: khớp cả trong câu văn tự do ("Thành thạo NodeJS và Docker")
+# - exact: từ dễ nhầm (go, rest, next...) chỉ khớp khi đứng riêng thành 1 mục kỹ năng
+# Khoá so khớp = bỏ dấu + lower + bỏ ký tự ngoài [a-z0-9+#] → "NodeJS" = "Node.js" = "node js".
+
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.utils.sections import fold
+
+ONTOLOGY_PATH = os.getenv("SKILL_ONTOLOGY_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "skills.json")
+
+MAX_SPAN = 4          # số token tối đa của 1 alias trong văn bản
+MAX_ITEM_LEN = 60     # mục không nhận diện được dài hơn → coi là câu văn, bỏ
+SHORT_ITEM_TOKENS = 3  # mục lạ ngắn (<= 3 token) giữ nguyên, dài hơn thì chỉ lấy kỹ năng trích được
+
+_KEY_DROP = re.compile(r"[^a-z0-9+#]")
+TOKEN_RE = re.compile(r"[^\s,;:()\[\]{}|•·/\\]+")
+SKILL_SPLIT = re.compile(r"[,\n;•|/]+")
+_WS = re.compile(r"\s+")
+
+
+def skill_key(s: str) -> str:
+    return _KEY_DROP.sub("", fold(s))
+
+
+def _clean_item(s: str) -> str:
+    return _WS.sub(" ", s).strip(" .,-")
+
+
+class SkillIndex:
+    def __init__(self, ontology: Dict[str, Dict[str, Any]]):
+        self.category: Dict[str, Optional[str]] = {}
+        self._alias: Dict[str, str] = {}   # khoá → tên chuẩn (khớp tự do)
+        self._exact: Dict[str, str] = {}   # khoá → tên chuẩn (chỉ khi cả mục)
+        self._trie: dict = {}
+        for name, spec in ontology.items():
+            spec = spec or {}
+            self.category[name] = spec.get("category")
+            exact = {skill_key(a) for a in spec.get("exact", [])}
+            for k in exact:
+                self._exact.setdefault(k, name)
+            for a in [name, *spec.get("aliases", [])]:
+                k = skill_key(a)
+                if len(k) < 2 or k in exact:
+                    continue
+                self._alias.setdefault(k, name)
+                node = self._trie
+                for ch in k:
+                    node = node.setdefault(ch, {})
+                node.setdefault("", name)
+
+    @classmethod
+    def load(cls, path: str = ONTOLOGY_PATH) -> "SkillIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def canonical(self, item: str) -> Optional[str]:
+        """Tên chuẩn nếu cả mục là 1 kỹ năng đã biết, ngược lại None."""
+        k = skill_key(item)
+        return self._alias.get(k) or self._exact.get(k)
+
+    def _scan(self, keys: List[str]) -> List[str]:
+        found: List[str] = []
+        i, n = 0, len(keys)
+        while i < n:
+            node, best, best_j = self._trie, None, i + 1
+            for j in range(i, min(i + MAX_SPAN, n)):
+                for ch in keys[j]:
+                    node = node.get(ch)
+                    if node is None:
+                        break
+                if node is None or not keys[j]:
+                    break
+                if "" in node:
+                    best, best_j = node[""], j + 1
+            if best:
+                found.append(best)
+                i = best_j
+            else:
+                i += 1
+        return found
+
+    def extract(self, text: str) -> List[str]:
+        """Quét văn bản tự do 1 lượt, trả các kỹ năng chuẩn (unique, theo thứ tự xuất hiện)."""
+        keys = [skill_key(t) for t in TOKEN_RE.findall(text or "")]
+        out, seen = [], set()
+        for name in self._scan(keys):
+            if name not in seen:
+                seen.add(name)
+                out.append(name)
+        return out
+
+    def normalize(self, items: Iterable[Any], max_item_len: int = MAX_ITEM_LEN) -> List[str]:
+        """
+        Chuẩn hoá danh sách mục kỹ năng (từ regex hoặc LLM):
+        alias → tên chuẩn; mục lạ ngắn giữ nguyên; câu dài → chỉ lấy kỹ năng trích được.
+        Bỏ trùng theo khoá chuẩn hoá.
+        """
+        out: List[str] = []
+        seen = set()
+
+        def add(name: str, key: str):
+            if key and key not in seen:
+                seen.add(key)
+                out.append(name)
+
+        for raw in items or []:
+            if not isinstance(raw, str):
+                continue
+            t = _clean_item(raw)
+            if not t:
+                continue
+            canon = self.canonical(t)
+            if canon:
+                add(canon, skill_key(canon))
+                continue
+            tokens = TOKEN_RE.findall(t)
+            if len(tokens) <= SHORT_ITEM_TOKENS and len(t) <= max_item_len:
+                add(t, skill_key(t))
+                continue
+            for name in self._scan([skill_key(x) for x in tokens]):
+                add(name, skill_key(name))
+        return out
+
+    def categories(self, skills: Iterable[str]) -> Dict[str, List[str]]:
+        """Gom kỹ năng đã chuẩn hoá theo nhóm ("other" cho kỹ năng ngoài ontology)."""
+        groups: Dict[str, List[str]] = {}
+        for s in skills:
+            groups.setdefault(self.category.get(s) or "other", []).append(s)
+        return groups
+
+
+@lru_cache(maxsize=1)
+def get_skill_index() -> SkillIndex:
+    return SkillIndex.load()
+
+
+def canonicalize_skills(items: Iterable[Any], max_item_len: int = MAX_ITEM_LEN) -> List[str]:
+    return get_skill_index().normalize(items, max_item_len)
+
+
+def extract_skills(text: str) -> List[str]:
+    return get_skill_index().extract(text)
+
+
+def skill_categories(skills: Iterable[str]) -> Dict[str, List[str]]:
+    return get_skill_index().categories(skills)
+
+
+def to_skills_str(v: Any) -> str:
+    """List hoặc chuỗi kỹ năng (LLM trả về) → 'A, B, C' đã chuẩn hoá + bỏ trùng."""
+    if not v:
+        return ""
+    if isinstance(v, list):
+        items = v
+    elif isinstance(v, str):
+        items = SKILL_SPLIT.split(v)
+    else:
+        return ""
+    return ", ".join(canonicalize_skills(items))
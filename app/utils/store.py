@@ -0,0 +1,114 @@
+# ===== Lưu raw_text theo content hash (sha256 file) — tra cứu riêng thay vì trả kèm mọi response =====
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+RAW_TEXT_MAX_CHARS = int(os.getenv("RAW_TEXT_STORE_MAX_CHARS", "50000000"))  # ~50M ký tự
+TEXT_STORE_DIR = os.getenv("TEXT_STORE_DIR", "")  # rỗng → không lưu text artifact ra đĩa
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class RawTextStore:
+    """LRU trong bộ nhớ, giới hạn theo tổng số ký tự; hash → (text, mode, ocr_langs — None nếu không OCR)."""
+
+    def __init__(self, max_chars: int = RAW_TEXT_MAX_CHARS):
+        self.max_chars = max_chars
+        self._items: "OrderedDict[str, Tuple[str, str, Optional[str]]]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def put(self, key: str, text: str, mode: str = "", ocr_langs: Optional[str] = None) -> None:
+        if len(text) > self.max_chars:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._chars -= len(old[0])
+            self._items[key] = (text, mode, ocr_langs)
+            self._chars += len(text)
+            while self._chars > self.max_chars:
+                _, (t, _, _) = self._items.popitem(last=False)
+                self._chars -= len(t)
+
+    def get(self, key: str) -> Optional[Tuple[str, str, Optional[str]]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+
+RAW_TEXTS = RawTextStore()
+
+
+# ===== Text artifact trên đĩa: extract (OCR) 1 lần, parse lại bao nhiêu lần cũng được =====
+# <root>/<hash[:2]>/<hash>.json.gz = {"content_hash", "extractor_version", "mode", "ocr_langs", "source",
+#                                     "pages": [{"mode", "chars"}], "text"}
+# text = nối các trang (offset trang i = tổng chars các trang trước), chưa strip.
+# ocr_langs: ngôn ngữ tesseract khi có trang OCR (None nếu không OCR) — extract lại khi lang_hint khác.
+
+def ocr_langs_of(pages: List[Tuple[str, str]], langs: Optional[str]) -> Optional[str]:
+    """langs nếu có trang nào OCR, không thì None (text layer / DOCX không phụ thuộc ngôn ngữ OCR)."""
+    return langs if any(m == "ocr" for _, m in pages) else None
+
+
+def make_artifact(digest: str, pages: List[Tuple[str, str]], mode: str, extractor_version: str,
+                  source: Optional[str] = None, ocr_langs: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "content_hash": digest,
+        "extractor_version": extractor_version,
+        "mode": mode,
+        "ocr_langs": ocr_langs_of(pages, ocr_langs),
+        "source": source,
+        "pages": [{"mode": m, "chars": len(t)} for t, m in pages],
+        "text": "".join(t for t, _ in pages),
+    }
+
+
+class TextArtifactStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + ".json.gz")
+
+    def get(self, digest: str, extractor_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """None nếu chưa có, hỏng, hoặc extractor_version khác (khi truyền vào)."""
+        try:
+            with gzip.open(self.path(digest), "rt", encoding="utf-8") as f:
+                art = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if extractor_version is not None and art.get("extractor_version") != extractor_version:
+            return None
+        return art
+
+    def put(self, art: Dict[str, Any]) -> None:
+        path = self.path(art["content_hash"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=5) as f:
+            json.dump(art, f, ensure_ascii=False)
+        os.replace(tmp, path)  # ghi nguyên tử: process khác không bao giờ đọc được file dở
+
+    def digests(self) -> Iterator[str]:
+        """Mọi content hash đang lưu, thứ tự ổn định."""
+        if not os.path.isdir(self.root):
+            return
+        for shard in sorted(os.listdir(self.root)):
+            d = os.path.join(self.root, shard)
+            if len(shard) == 2 and os.path.isdir(d):
+                for name in sorted(os.listdir(d)):
+                    if name.endswith(".json.gz"):
+                        yield name[: -len(".json.gz")]
+
+
+TEXT_ARTIFACTS: Optional[TextArtifactStore] = TextArtifactStore(TEXT_STORE_DIR) if TEXT_STORE_DIR else None
@@ -0,0 +1,108 @@
+# ===== Nhận file multipart theo luồng (không base64, không giữ cả body trong RAM) =====
+# Part "file" → SpooledTemporaryFile (tràn ra đĩa khi lớn) + sha256 cập nhật dần + chặn MAX_BYTES ngay khi đang nhận.
+# Các part còn lại (file_mime, lang_hint, ...) là field text nhỏ.
+
+import hashlib
+import os
+from tempfile import SpooledTemporaryFile
+from typing import Dict, Optional
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart <= 0.0.12
+    from multipart.multipart import MultipartParser, parse_options_header
+
+SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+MAX_FIELD_BYTES = 4096
+
+
+class StreamingUpload:
+    def __init__(self, max_bytes: int, file_field: str = "file"):
+        self.max_bytes = max_bytes
+        self.file_field = file_field
+        self.fields: Dict[str, str] = {}
+        self.file = SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        self.sha = hashlib.sha256()
+        self.size = 0
+        self.too_large = False
+        self.has_file = False
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._hname = self._hval = b""
+        self._name: Optional[str] = None
+        self._is_file = False
+        self._buf = bytearray()
+
+    # --- callbacks cho MultipartParser ---
+    def on_part_begin(self):
+        self._headers, self._name, self._is_file, self._buf = {}, None, False, bytearray()
+
+    def on_header_field(self, data, start, end):
+        self._hname += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._hval += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._hname.lower()] = self._hval
+        self._hname = self._hval = b""
+
+    def on_headers_finished(self):
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = params.get(b"name", b"").decode("utf-8", "replace")
+        self._is_file = self._name == self.file_field and not self.has_file
+        if self._is_file:
+            self.has_file = True
+            fn = params.get(b"filename")
+            self.filename = fn.decode("utf-8", "replace") if fn else None
+            ct = self._headers.get(b"content-type")
+            self.content_type = ct.decode("latin-1").strip() if ct else None
+
+    def on_part_data(self, data, start, end):
+        if self._is_file:
+            if self.too_large:
+                return
+            self.size += end - start
+            if self.size > self.max_bytes:
+                self.too_large = True
+                return
+            chunk = data[start:end]
+            self.sha.update(chunk)
+            self.file.write(chunk)
+        elif len(self._buf) + (end - start) <= MAX_FIELD_BYTES:
+            self._buf += data[start:end]
+
+    def on_part_end(self):
+        if not self._is_file and self._name:
+            self.fields[self._name] = self._buf.decode("utf-8", "replace")
+
+    def parser(self, boundary: bytes) -> MultipartParser:
+        return MultipartParser(boundary, {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        })
+
+    # --- kết quả ---
+    @property
+    def digest(self) -> str:
+        return self.sha.hexdigest()
+
+    def read_bytes(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def multipart_boundary(content_type: str) -> Optional[bytes]:
+    ctype, params = parse_options_header(content_type or "")
+    if ctype != b"multipart/form-data":
+        return None
+    return params.get(b"boundary")
@@ -0,0 +1,192 @@
+# ===== Warm-up trước khi báo ready (readiness probe /ready) =====
+# Import nặng đã được dời vào đúng nhánh code dùng tới (OCR, Gemini, OpenAI) → khởi động nhanh.
+# Warm-up trả trước những chi phí "lần đầu" đó để request đầu tiên không phải gánh:
+#   parse  nạp ontology kỹ năng, chạy thử heuristic_parse / extract_position trên CV mẫu
+#   ocr    pdfminer + pypdfium2 trên 1 PDF trắng, kiểm tra ngôn ngữ tesseract đã cài, OCR thử 1 ảnh nhỏ
+#   llm    import + khởi tạo client OpenAI / Gemini (chỉ khi có key; không gọi mạng, không tốn token)
+# WARMUP_STEPS="parse,ocr,llm" (mặc định) | "none". Chạy ở thread nền: /health sống ngay, /ready 503 tới khi xong.
+# WARMUP_BLOCKING=1 → chạy ngay trong startup (uvicorn chỉ mở cổng khi xong; cho nền tảng chỉ probe TCP).
+# WARMUP_STRICT=1 → có bước lỗi thì không bao giờ ready (VD thiếu gói ngôn ngữ OCR).
+
+import gc
+import io
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.metrics import STARTUP_SECONDS
+
+WARMUP_STEPS = [s.strip() for s in os.getenv("WARMUP_STEPS", "parse,ocr,llm").split(",")
+                if s.strip() and s.strip() != "none"]
+WARMUP_BLOCKING = os.getenv("WARMUP_BLOCKING", "0") == "1"
+WARMUP_STRICT = os.getenv("WARMUP_STRICT", "0") == "1"
+WARMUP_OCR_LANGS = os.getenv("WARMUP_OCR_LANGS") or os.getenv("OCR_LANGS", "eng").replace(" ", "")
+
+# path không tính là "request đầu tiên" (probe / scrape)
+PROBE_PATHS = {"/health", "/ready", "/metrics", "unmatched"}
+
+SAMPLE_CV = """Nguyễn Văn An
+Backend Developer
+Email: an.nguyen@example.com | SĐT: 0901 234 567
+GitHub: https://github.com/annguyen
+
+KỸ NĂNG
+Back-End: NodeJS, Python, PostgreSQL, Docker
+
+HỌC VẤN
+Đại học Bách Khoa TP.HCM  09/2016 - 06/2020
+
+KINH NGHIỆM
+FPT Software  03/2021 - Hiện tại
+Backend Developer
+"""
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {
+    "ready": False,
+    "steps": {},              # name → {"s": giây, "error": str | None}
+    "import_s": None,         # import app.main
+    "warmup_s": None,
+    "ready_s": None,          # từ lúc bắt đầu import app.main tới ready
+    "process_ready_s": None,  # từ lúc process khởi động (gồm interpreter + uvicorn) tới ready
+    "first_request": None,    # {"path", "ms", "after_ready_s"}
+}
+_t_ready: Optional[float] = None
+
+
+def _process_age() -> Optional[float]:
+    """Số giây kể từ lúc process khởi động (Linux /proc); None nếu không đọc được."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# ---------- các bước ----------
+
+def _warm_parse() -> None:
+    from app.parsers import heuristic_parse
+    from app.utils.position import extract_position
+    from app.utils.skills import get_skill_index
+    get_skill_index()
+    heuristic_parse(SAMPLE_CV)
+    extract_position("[Ứng tuyển] Vị trí Backend Developer - Nguyễn Văn An")
+
+
+def _warm_ocr() -> None:
+    import pypdfium2 as pdfium
+    from pdfminer.high_level import extract_text
+    from PIL import Image, ImageDraw
+    from app.ocr import _pdf_pages, _tesseract
+
+    doc = pdfium.PdfDocument.new()
+    doc.new_page(200, 100)
+    buf = io.BytesIO()
+    doc.save(buf)
+    pdf = buf.getvalue()
+    extract_text(io.BytesIO(pdf))   # nạp layout/converter/font của pdfminer
+    list(_pdf_pages(pdf))           # nạp pdfium renderer
+
+    tess = _tesseract()
+    wanted = set(WARMUP_OCR_LANGS.split("+"))
+    missing = wanted - set(tess.get_languages(config=""))
+    if missing:
+        raise RuntimeError(f"tesseract thiếu ngôn ngữ: {sorted(missing)}")
+    img = Image.new("L", (240, 60), 255)
+    ImageDraw.Draw(img).text((10, 20), "Warm up 123", fill=0)
+    tess.image_to_string(img, lang=WARMUP_OCR_LANGS)  # đọc traineddata lần đầu (page cache)
+
+
+def _warm_llm() -> None:
+    if os.getenv("OPENAI_API_KEY"):
+        from app.parsers import _openai_client
+        _openai_client()
+    key = os.getenv("GEMINI_API_KEY")
+    if key:
+        from app.utils.pdf import gemini_client, resolve_model_name
+        gemini_client(key).GenerativeModel(model_name=resolve_model_name())
+
+
+STEPS: Dict[str, Callable[[], None]] = {
+    "parse": _warm_parse,
+    "ocr": _warm_ocr,
+    "llm": _warm_llm,
+}
+
+
+# ---------- vòng đời ----------
+
+def run(import_t0: float) -> None:
+    global _t_ready
+    t0 = time.perf_counter()
+    failed = False
+    for name in WARMUP_STEPS:
+        fn = STEPS.get(name)
+        ts = time.perf_counter()
+        err = None
+        try:
+            if fn is None:
+                raise ValueError(f"unknown warm-up step: {name}")
+            fn()
+        except Exception as e:
+            err = f"{type(e).__name__}: {e}"
+            failed = True
+            print(f"[warmup] {name} lỗi: {err}")
+        dt = time.perf_counter() - ts
+        STARTUP_SECONDS.set(dt, phase=f"warmup_{name}")
+        with _lock:
+            _state["steps"][name] = {"s": round(dt, 4), "error": err}
+
+    # object tạo lúc import/warm-up (module, protobuf descriptor, regex...) sống suốt process →
+    # đưa ra khỏi diện quét của GC để request đầu không gánh 1 lượt gen2 collection lớn
+    gc.collect()
+    gc.freeze()
+
+    now = time.perf_counter()
+    age = _process_age()
+    with _lock:
+        _state["warmup_s"] = round(now - t0, 4)
+        _state["ready_s"] = round(now - import_t0, 4)
+        _state["process_ready_s"] = None if age is None else round(age, 3)
+        _state["ready"] = not (failed and WARMUP_STRICT)
+        if _state["ready"]:
+            _t_ready = now
+    STARTUP_SECONDS.set(now - t0, phase="warmup")
+    STARTUP_SECONDS.set(now - import_t0, phase="ready")
+    if age is not None:
+        STARTUP_SECONDS.set(age, phase="process_ready")
+    print(f"[warmup] ready={_state['ready']} in {now - import_t0:.3f}s "
+          f"(import {_state['import_s']}s, warm-up {now - t0:.3f}s: "
+          + ", ".join(f"{k}={v['s']}s" for k, v in _state["steps"].items()) + ")")
+
+
+def start(import_t0: float, import_done: float) -> None:
+    """Gọi từ lifespan của app."""
+    with _lock:
+        _state["import_s"] = round(import_done - import_t0, 4)
+    STARTUP_SECONDS.set(import_done - import_t0, phase="import")
+    if WARMUP_BLOCKING:
+        run(import_t0)
+    else:
+        threading.Thread(target=run, args=(import_t0,), name="warmup", daemon=True).start()
+
+
+def record_request(path: str, seconds: float) -> None:
+    """Ghi latency của request nghiệp vụ đầu tiên (bỏ qua probe); gọi từ timing middleware."""
+    if _state["first_request"] is not None or path in PROBE_PATHS:
+        return
+    with _lock:
+        if _state["first_request"] is None:
+            after = None if _t_ready is None else round(time.perf_counter() - seconds - _t_ready, 3)
+            _state["first_request"] = {"path": path, "ms": round(seconds * 1000, 1), "after_ready_s": after}
+            STARTUP_SECONDS.set(seconds, phase="first_request")
+
+
+def status() -> Dict[str, Any]:
+    with _lock:
+        return {**_state, "steps": dict(_state["steps"])}
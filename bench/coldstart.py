@@ -0,0 +1,88 @@
+# ===== Đo cold start: spawn uvicorn → cổng mở → /ready → request đầu tiên / thứ hai =====
+#   python -m bench.coldstart                                   # so sánh WARMUP_STEPS=none với mặc định
+#   python -m bench.coldstart --variants "none|parse|parse,ocr,llm" --repeat 5 --kind docx --out cold.json
+#
+# Mỗi lần chạy: process mới hoàn toàn; lấy trung vị qua --repeat lần. In kèm số liệu app tự đo ở /ready
+# (import app.main, từng bước warm-up, process_ready_s tính từ lúc process khởi động).
+
+import argparse
+import base64
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import requests
+
+from bench.corpus import EXTS, generate
+from bench.load import _spawn, _wait_ready
+
+
+def _once(port: int, steps: str, body: Dict[str, Any], endpoint: str) -> Dict[str, Any]:
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    proc = _spawn("app.main:app", port, {"WARMUP_STEPS": steps or "none", "WARMUP_BLOCKING": "0"})
+    try:
+        listen = _wait_ready(f"{base}/health", 120, proc)
+        # /ready: poll dày hơn _wait_ready để không làm tròn lên 100ms
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError("app exited during warm-up")
+            if requests.get(f"{base}/ready", timeout=5).status_code == 200:
+                break
+            time.sleep(0.01)
+        ready = time.perf_counter() - t0
+        lat = []
+        for _ in range(2):
+            ts = time.perf_counter()
+            r = requests.post(f"{base}/{endpoint}", json=body, timeout=120)
+            lat.append(time.perf_counter() - ts)
+            if r.status_code != 200:
+                raise RuntimeError(f"{endpoint} → {r.status_code}: {r.text[:200]}")
+        internal = requests.get(f"{base}/ready", timeout=5).json()
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {"listen_s": listen, "ready_s": ready, "first_ms": lat[0] * 1000, "second_ms": lat[1] * 1000,
+            "internal": internal}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Đo cold-start-to-ready và latency request đầu tiên")
+    ap.add_argument("--variants", default="none|parse,ocr,llm", help="các giá trị WARMUP_STEPS, phân cách '|'")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--port", type=int, default=8182)
+    ap.add_argument("--kind", default="text_pdf", help="dạng file gửi tới /parse-resume-base64")
+    ap.add_argument("--out")
+    a = ap.parse_args(argv)
+
+    d = next(generate(1, 0, [a.kind]))
+    body = {"file_base64": base64.b64encode(d.data).decode(), "file_name": f"cv.{EXTS[a.kind]}",
+            "file_mime": d.mime}
+    endpoint = "parse-resume-base64"
+
+    report: List[Dict[str, Any]] = []
+    print(f"{'WARMUP_STEPS':18} {'listen s':>9} {'ready s':>9} {'1st ms':>9} {'2nd ms':>9}  app: import / warm-up steps")
+    for steps in a.variants.split("|"):
+        runs = [_once(a.port, steps, body, endpoint) for _ in range(a.repeat)]
+        med = {k: statistics.median(r[k] for r in runs) for k in ("listen_s", "ready_s", "first_ms", "second_ms")}
+        last = runs[-1]["internal"]
+        warm = ", ".join(f"{k}={v['s']}s" + (" (err)" if v["error"] else "") for k, v in last["steps"].items())
+        print(f"{steps:18} {med['listen_s']:>9.3f} {med['ready_s']:>9.3f} {med['first_ms']:>9.1f} "
+              f"{med['second_ms']:>9.1f}  {last['import_s']}s / {warm or '-'}")
+        report.append({"warmup_steps": steps, "median": med, "runs": runs})
+
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"wrote {a.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+# ===== Sinh corpus CV tổng hợp, tất định theo seed (tiếng Việt + tiếng Anh) =====
+# Mỗi CV có ground truth (tên, email, SĐT, kỹ năng chuẩn, vị trí) và được xuất ra nhiều dạng:
+#   text_pdf     PDF có text layer (font Helvetica chuẩn → chữ tiếng Việt bị bỏ dấu, như CV xuất từ tool cũ)
+#   scanned_pdf  PDF chỉ có ảnh JPEG từng trang (máy scan)
+#   mixed_pdf    trang 1 text layer, các trang sau là ảnh scan
+#   photo_jpeg   ảnh chụp điện thoại trang 1: 12MP, nghiêng nhẹ, nền tối, EXIF Orientation=6
+#   tiff         TIFF nhiều trang 1-bit (fax/scan)
+#   docx         DOCX tối giản (word/document.xml)
+# Cùng seed → cùng bytes (không dùng timestamp, không dùng noise ngẫu nhiên của PIL).
+#
+#   python -m bench.corpus --out /tmp/cv-corpus --per-kind 10
+
+import argparse
+import io
+import json
+import os
+import random
+import unicodedata
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageOps
+
+KINDS = ("text_pdf", "scanned_pdf", "mixed_pdf", "photo_jpeg", "tiff", "docx")
+MIMES = {
+    "text_pdf": "application/pdf",
+    "scanned_pdf": "application/pdf",
+    "mixed_pdf": "application/pdf",
+    "photo_jpeg": "image/jpeg",
+    "tiff": "image/tiff",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+EXTS = {"text_pdf": "pdf", "scanned_pdf": "pdf", "mixed_pdf": "pdf",
+        "photo_jpeg": "jpg", "tiff": "tif", "docx": "docx"}
+
+SKILLS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "app", "data", "skills.json")
+
+# Font TTF có glyph tiếng Việt; không có → vẽ bằng font mặc định của PIL với chữ đã bỏ dấu
+FONT_CANDIDATES = [
+    os.getenv("BENCH_FONT", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+]
+
+# A4 @150dpi
+PAGE_PX = (1240, 1754)
+PAGE_PT = (595, 842)
+LINES_PER_PAGE = 56
+
+HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Võ", "Đặng", "Bùi", "Đỗ", "Huỳnh"]
+DEM = ["Văn", "Thị", "Minh", "Hoàng", "Ngọc", "Đức", "Thanh", "Quốc", "Gia"]
+TEN = ["An", "Bình", "Châu", "Dũng", "Hà", "Khoa", "Linh", "Nam", "Phúc", "Quân", "Trang", "Vy"]
+CITIES = ["TP. Hồ Chí Minh", "Hà Nội", "Đà Nẵng", "Cần Thơ", "Hải Phòng"]
+STREETS = ["Nguyễn Trãi", "Lê Lợi", "Trần Hưng Đạo", "Võ Văn Tần", "Điện Biên Phủ"]
+SCHOOLS = ["Đại học Bách Khoa TP.HCM", "Đại học Khoa học Tự nhiên", "Đại học FPT",
+           "Đại học Công nghệ - ĐHQGHN", "Đại học Cần Thơ"]
+COMPANIES = ["FPT Software", "VNG Corporation", "Tiki", "MoMo", "KMS Technology", "NashTech", "Viettel"]
+ROLES = ["Backend Developer", "Frontend Developer", "Fullstack Developer", "Mobile Developer",
+         "DevOps Engineer", "Data Engineer", "QA/QC Tester", "Python Developer"]
+
+VI = {
+    "about": "GIỚI THIỆU BẢN THÂN", "education": "HỌC VẤN", "experience": "KINH NGHIỆM LÀM VIỆC",
+    "projects": "DỰ ÁN", "skills": "KỸ NĂNG", "languages": "NGOẠI NGỮ",
+    "phone": "Số điện thoại", "address": "Địa chỉ", "present": "Hiện tại",
+    "degree": "Kỹ sư Công nghệ thông tin",
+    "summary": ["Có {y} năm kinh nghiệm phát triển phần mềm, yêu thích hệ thống phân tán.",
+                "Mong muốn gắn bó lâu dài và phát triển lên vị trí Tech Lead."],
+    "bullets": ["Thiết kế và phát triển API phục vụ hơn 1 triệu người dùng.",
+                "Tối ưu truy vấn cơ sở dữ liệu, giảm 40% thời gian phản hồi.",
+                "Viết unit test và thiết lập CI/CD cho dự án.",
+                "Phối hợp với team sản phẩm phân tích yêu cầu.",
+                "Hướng dẫn thành viên mới, review code hằng ngày."],
+    "project": "Hệ thống quản lý {x}", "things": ["bán hàng", "kho", "nhân sự", "đặt lịch", "thư viện"],
+    "lang_lines": ["Tiếng Anh - TOEIC 780", "Tiếng Nhật - N3"],
+    "subject": "[Ứng tuyển] Vị trí {role} - {name}",
+}
+EN = {
+    "about": "ABOUT ME", "education": "EDUCATION", "experience": "WORK EXPERIENCE",
+    "projects": "PERSONAL PROJECTS", "skills": "TECHNICAL SKILLS", "languages": "LANGUAGES",
+    "phone": "Phone", "address": "Address", "present": "Present",
+    "degree": "Bachelor of Software Engineering",
+    "summary": ["Software engineer with {y} years of experience building web services.",
+                "Looking for a team that values ownership and clean code."],
+    "bullets": ["Designed and shipped REST APIs serving over 1M users.",
+                "Cut p95 latency by 40% by reworking database indexes.",
+                "Set up CI/CD pipelines and raised test coverage to 80%.",
+                "Worked with product owners to refine requirements.",
+                "Mentored two junior engineers through code review."],
+    "project": "{x} management system", "things": ["Sales", "Inventory", "HR", "Booking", "Library"],
+    "lang_lines": ["English - IELTS 7.0", "Vietnamese - Native"],
+    "subject": "Application for {role} position - {name}",
+}
+
+
+@dataclass
+class Doc:
+    id: str
+    kind: str
+    lang: str
+    mime: str
+    data: bytes
+    text: str                      # văn bản gốc đã dùng để dựng file
+    truth: Dict[str, object] = field(default_factory=dict)
+
+
+def strip_accents(s: str) -> str:
+    """Bỏ dấu nhưng giữ hoa/thường (khác sections.fold — fold còn lower)."""
+    s = s.replace("đ", "d").replace("Đ", "D")
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+
+def _skill_pool() -> List[tuple]:
+    """(tên chuẩn, [cách viết]) — chỉ lấy alias khớp tự do, bỏ các từ 'exact' dễ nhầm."""
+    with open(SKILLS_PATH, encoding="utf-8") as f:
+        onto = json.load(f)
+    return [(name, [name, *spec.get("aliases", [])]) for name, spec in onto.items()
+            if spec.get("aliases")]
+
+
+_SKILLS = _skill_pool()
+
+
+def _phone(rng: random.Random) -> tuple:
+    digits = "0" + rng.choice("357893") + "".join(rng.choice("0123456789") for _ in range(8))
+    style = rng.randrange(4)
+    if style == 0:
+        shown = f"{digits[:4]} {digits[4:7]} {digits[7:]}"
+    elif style == 1:
+        shown = f"+84 {digits[1:3]} {digits[3:6]} {digits[6:]}"
+    elif style == 2:
+        shown = f"{digits[:4]}.{digits[4:7]}.{digits[7:]}"
+    else:
+        shown = digits
+    return shown, digits
+
+
+def make_cv(rng: random.Random, lang: str) -> tuple:
+    """Trả (text, truth)."""
+    L = VI if lang == "vi" else EN
+    ho, dem, ten = rng.choice(HO), rng.choice(DEM), rng.choice(TEN)
+    name = f"{ho} {dem} {ten}"
+    if lang == "en":
+        name = strip_accents(name)
+    email = f"{strip_accents(ten).lower()}.{strip_accents(ho).lower()}{rng.randrange(10, 99)}@gmail.com"
+    phone_shown, phone_digits = _phone(rng)
+    role = rng.choice(ROLES)
+    gh = strip_accents(ten + ho).lower() + str(rng.randrange(100, 999))
+    years = rng.randrange(1, 8)
+
+    picked = rng.sample(_SKILLS, rng.randrange(6, 12))
+    skills = [canon for canon, _ in picked]
+    surfaces = [rng.choice(forms) for _, forms in picked]
+
+    lines = [
+        name.upper() if rng.random() < 0.3 else name,
+        role,
+        f"Email: {email}",
+        f"{L['phone']}: {phone_shown}",
+        f"{L['address']}: {rng.randrange(1, 300)}/{rng.randrange(1, 50)} {rng.choice(STREETS)}, "
+        f"{rng.choice(CITIES)}",
+        f"GitHub: https://github.com/{gh}",
+        f"LinkedIn: https://www.linkedin.com/in/{gh}",
+        "",
+        L["about"],
+        role,
+        *[s.format(y=years) for s in L["summary"]],
+        "",
+        L["education"],
+        f"{rng.choice(SCHOOLS)}  09/{2010 + years} - 06/{2014 + years}",
+        L["degree"],
+        "",
+        L["experience"],
+    ]
+    year = 2024
+    for _ in range(rng.randrange(1, 4)):
+        start = year - rng.randrange(1, 3)
+        to = L["present"] if year == 2024 else f"{rng.randrange(1, 13):02d}/{year}"
+        lines += [f"{rng.choice(COMPANIES)}  {rng.randrange(1, 13):02d}/{start} - {to}", role]
+        lines += ["- " + b for b in rng.sample(L["bullets"], 3)]
+        year = start
+    lines += ["", L["projects"]]
+    for _ in range(rng.randrange(1, 4)):
+        thing = rng.choice(L["things"])
+        lines += [L["project"].format(x=thing), f"Tech: {', '.join(rng.sample(surfaces, 3))}",
+                  "- " + rng.choice(L["bullets"])]
+    half = len(surfaces) // 2
+    lines += ["", L["skills"],
+              f"Back-End: {', '.join(surfaces[:half])}",
+              f"Tools: {', '.join(surfaces[half:])}",
+              "", L["languages"], *L["lang_lines"]]
+
+    truth = {
+        "full_name": name,
+        "email": email,
+        "phone_digits": phone_digits,
+        "skills": skills,
+        "position": role,
+        "subject": L["subject"].format(role=role, name=name),
+    }
+    return "\n".join(lines), truth
+
+
+# ---------- PDF tối giản (không phụ thuộc thư viện ngoài) ----------
+
+def _pdf_escape(s: str) -> bytes:
+    b = strip_accents(s).encode("cp1252", "replace")
+    return b.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _text_stream(lines: List[str]) -> bytes:
+    out = [b"BT /F1 10 Tf 13 TL 50 800 Td"]
+    for ln in lines:
+        out.append(b"(" + _pdf_escape(ln) + b") Tj T*")
+    out.append(b"ET")
+    return b"\n".join(out)
+
+
+def build_pdf(pages: List[dict]) -> bytes:
+    """pages: [{"lines": [...]}, {"jpeg": (bytes, w, h)}, ...] → bytes PDF hợp lệ."""
+    objs: List[Optional[bytes]] = [None, None]  # 1 = Catalog, 2 = Pages
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    kids = []
+    for p in pages:
+        if "jpeg" in p:
+            data, w, h = p["jpeg"]
+            objs.append(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                        b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>\nstream\n" % (w, h, len(data))
+                        + data + b"\nendstream")
+            img_id = len(objs)
+            content = b"q %d 0 0 %d 0 0 cm /Im1 Do Q" % PAGE_PT
+            res = b"/Resources << /XObject << /Im1 %d 0 R >> >>" % img_id
+        else:
+            content = _text_stream(p["lines"])
+            res = b"/Resources << /Font << /F1 3 0 R >> >>"
+        objs.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objs.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] %s /Contents %d 0 R >>"
+                    % (*PAGE_PT, res, len(objs)))
+        kids.append(len(objs))
+    objs[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    buf = io.BytesIO()
+    buf.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, 1):
+        offsets.append(buf.tell())
+        buf.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref = buf.tell()
+    buf.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1))
+    for off in offsets:
+        buf.write(b"%010d 00000 n \n" % off)
+    buf.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref))
+    return buf.getvalue()
+
+
+# ---------- raster ----------
+
+_FONT = None
+
+
+def _font():
+    """(font, có glyph tiếng Việt?) — nạp 1 lần."""
+    global _FONT
+    if _FONT is None:
+        for p in FONT_CANDIDATES:
+            if p and os.path.isfile(p):
+                _FONT = (ImageFont.truetype(p, 22), True)
+                break
+        else:
+            _FONT = (ImageFont.load_default(size=22), False)
+    return _FONT
+
+
+def paginate(text: str) -> List[List[str]]:
+    lines = text.split("\n")
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+
+def render_page(lines: List[str], skew: float = 0.0) -> Image.Image:
+    font, unicode_ok = _font()
+    im = Image.new("L", PAGE_PX, 255)
+    d = ImageDraw.Draw(im)
+    y = 90
+    for ln in lines:
+        d.text((100, y), ln if unicode_ok else strip_accents(ln), fill=0, font=font)
+        y += 29
+    if skew:
+        im = im.rotate(skew, resample=Image.BILINEAR, fillcolor=255)
+    return im.filter(ImageFilter.GaussianBlur(0.6))  # mờ nhẹ như bản scan
+
+
+def _jpeg(im: Image.Image, quality: int) -> bytes:
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def to_text_pdf(text: str, rng: random.Random) -> bytes:
+    return build_pdf([{"lines": p} for p in paginate(text)])
+
+
+def to_scanned_pdf(text: str, rng: random.Random) -> bytes:
+    pages = []
+    for lines in paginate(text):
+        im = render_page(lines, skew=rng.uniform(-1.0, 1.0))
+        pages.append({"jpeg": (_jpeg(im, 75), *im.size)})
+    return build_pdf(pages)
+
+
+def to_mixed_pdf(text: str, rng: random.Random) -> bytes:
+    pages = paginate(text)
+    if len(pages) == 1:  # đảm bảo luôn có ít nhất 1 trang ảnh
+        mid = len(pages[0]) // 2
+        pages = [pages[0][:mid], pages[0][mid:]]
+    out = [{"lines": pages[0]}]
+    for lines in pages[1:]:
+        im = render_page(lines, skew=rng.uniform(-1.0, 1.0))
+        out.append({"jpeg": (_jpeg(im, 75), *im.size)})
+    return build_pdf(out)
+
+
+def to_photo_jpeg(text: str, rng: random.Random) -> bytes:
+    page = render_page(paginate(text)[0], skew=rng.uniform(-4.0, 4.0)).convert("RGB")
+    # 12MP dọc như camera điện thoại; tờ giấy nằm giữa nền bàn tối, sáng không đều
+    W, H = 3024, 4032
+    bg = Image.new("RGB", (W, H), (70, 60, 50))
+    page = page.resize((int(W * 0.86), int(W * 0.86 * PAGE_PX[1] / PAGE_PX[0])), Image.BILINEAR)
+    bg.paste(page, ((W - page.width) // 2, (H - page.height) // 2))
+    shade = Image.linear_gradient("L").resize((W, H)).point(lambda v: 255 - v // 4)
+    photo = Image.composite(bg, Image.new("RGB", (W, H), 0), shade)
+    # lưu ở dạng cảm biến nằm ngang + EXIF Orientation=6 (exif_transpose xoay lại 270°)
+    stored = photo.transpose(Image.Transpose.ROTATE_90)
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buf = io.BytesIO()
+    stored.save(buf, "JPEG", quality=88, exif=exif)
+    return buf.getvalue()
+
+
+def to_tiff(text: str, rng: random.Random) -> bytes:
+    frames = [render_page(lines, skew=rng.uniform(-0.5, 0.5)).point(lambda v: 255 if v > 160 else 0, "1")
+              for lines in paginate(text)]
+    buf = io.BytesIO()
+    frames[0].save(buf, "TIFF", save_all=True, append_images=frames[1:], compression="group4")
+    return buf.getvalue()
+
+
+def to_docx(text: str, rng: random.Random) -> bytes:
+    from xml.sax.saxutils import escape
+    paras = "".join(f'<w:p><w:r><w:t xml:space="preserve">{escape(ln)}</w:t></w:r></w:p>'
+                    for ln in text.split("\n"))
+    doc = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+           '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+           f"<w:body>{paras}</w:body></w:document>")
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, body in (
+            ("[Content_Types].xml",
+             '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/'
+             'package/2006/content-types"><Default Extension="xml" ContentType="application/xml"/>'
+             '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-'
+             'officedocument.wordprocessingml.document.main+xml"/></Types>'),
+            ("word/document.xml", doc),
+        ):
+            info = zipfile.ZipInfo(name, date_time=(2024, 1, 1, 0, 0, 0))  # tất định
+            z.writestr(info, body, zipfile.ZIP_DEFLATED)
+    return buf.getvalue()
+
+
+RENDERERS = {
+    "text_pdf": to_text_pdf,
+    "scanned_pdf": to_scanned_pdf,
+    "mixed_pdf": to_mixed_pdf,
+    "photo_jpeg": to_photo_jpeg,
+    "tiff": to_tiff,
+    "docx": to_docx,
+}
+
+
+def generate(per_kind: int = 5, seed: int = 0, kinds=KINDS) -> Iterator[Doc]:
+    """Sinh lười từng Doc; CV thứ i của mỗi dạng giống nhau giữa các dạng (cùng nội dung, khác định dạng)."""
+    for i in range(per_kind):
+        lang = "vi" if i % 3 != 2 else "en"  # ~2/3 CV tiếng Việt
+        text, truth = make_cv(random.Random(f"{seed}:cv:{i}"), lang)
+        for kind in kinds:
+            rng = random.Random(f"{seed}:{kind}:{i}")
+            yield Doc(id=f"{kind}-{i:04d}", kind=kind, lang=lang, mime=MIMES[kind],
+                      data=RENDERERS[kind](text, rng), text=text, truth=truth)
+
+
+def write_corpus(out_dir: str, per_kind: int = 5, seed: int = 0, kinds=KINDS) -> int:
+    """Ghi file + truth.jsonl (1 dòng / file) vào out_dir, trả số file."""
+    os.makedirs(out_dir, exist_ok=True)
+    n = 0
+    with open(os.path.join(out_dir, "truth.jsonl"), "w", encoding="utf-8") as f:
+        for doc in generate(per_kind, seed, kinds):
+            fname = f"{doc.id}.{EXTS[doc.kind]}"
+            with open(os.path.join(out_dir, fname), "wb") as g:
+                g.write(doc.data)
+            f.write(json.dumps({"file": fname, "kind": doc.kind, "lang": doc.lang, "mime": doc.mime,
+                                **doc.truth}, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Sinh corpus CV tổng hợp có ground truth")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--per-kind", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--kinds", default=",".join(KINDS))
+    a = ap.parse_args(argv)
+    n = write_corpus(a.out, a.per_kind, a.seed, [k for k in a.kinds.split(",") if k])
+    print(f"{n} files → {a.out}")
+
+
+if __name__ == "__main__":
+    main()
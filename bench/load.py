@@ -0,0 +1,214 @@
+# ===== Load test end-to-end: uvicorn thật + dịch vụ ngoài giả lập (bench/stubs.py) =====
+#   python -m bench.load                                        # tự bật stub + app, quét concurrency 1,4,16
+#   python -m bench.load --concurrency 1,8,32 --duration 20 --app-workers 2 \
+#       --latency gs=80,drive=40,openai=900,gemini=1200 --throttle-rate openai=0.02 --out load.json
+#   python -m bench.load --target http://127.0.0.1:8080         # app đã chạy sẵn (tự trỏ GS_URL... về stub;
+#                                                               # chạy app với DEDUP_MODE=off RAW_TEXT_STORE_MAX_CHARS=0)
+#
+# Mỗi (endpoint, concurrency): `warmup` giây bỏ qua rồi đo `duration` giây;
+# báo throughput (request thành công / giây), p50/p95/p99, tỉ lệ lỗi theo status code.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from bench.run import _pct
+
+DEFAULT_ENDPOINTS = "parse-resume,gemini/parse-resume"
+BASE64_ENDPOINT = "parse-resume-base64"
+
+
+def _wait_ready(url: str, timeout: float, proc: Optional[subprocess.Popen] = None) -> float:
+    """Poll tới khi url trả 200; trả số giây đã chờ."""
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"process exited early ({proc.returncode}) while waiting for {url}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return time.perf_counter() - t0
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"not ready after {timeout}s: {url}")
+
+
+def _spawn(module_app: str, port: int, env: Dict[str, str], workers: int = 1) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", module_app, "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning", "--no-access-log"]
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    return subprocess.Popen(cmd, env={**os.environ, **env})
+
+
+def app_env(stub: str) -> Dict[str, str]:
+    """
+    ENV trỏ mọi dịch vụ ngoài của app về stub; rate limit LLM nới rộng (đo app, không đo limiter).
+    Stub chỉ xoay vòng vài chục file → tắt dedup + cache text (mặc định), không thì sau vòng đầu mọi request
+    chỉ là tra content hash, không tải / extract / gọi LLM. Đặt DEDUP_MODE / RAW_TEXT_STORE_MAX_CHARS để đo nhánh cache.
+    """
+    env = {
+        "GS_URL": f"{stub}/gs",
+        "GS_TOKEN": "load-test",
+        "DRIVE_BASE_URL": stub,
+        "OPENAI_BASE_URL": f"{stub}/v1",
+        "OPENAI_API_KEY": "stub",
+        "GEMINI_API_KEY": "stub",
+        "GEMINI_API_ENDPOINT": stub,
+        "DEDUP_MODE": os.getenv("DEDUP_MODE", "off"),
+        "RAW_TEXT_STORE_MAX_CHARS": os.getenv("RAW_TEXT_STORE_MAX_CHARS", "0"),
+        "TEXT_STORE_DIR": os.getenv("TEXT_STORE_DIR", ""),
+    }
+    for p in ("OPENAI", "GEMINI"):
+        env.setdefault(f"LLM_{p}_RPS", os.getenv(f"LLM_{p}_RPS", "1000"))
+        env.setdefault(f"LLM_{p}_BURST", os.getenv(f"LLM_{p}_BURST", "1000"))
+    return env
+
+
+def _base64_body(kind: str) -> Dict[str, Any]:
+    import base64
+    from bench.corpus import EXTS, generate
+    d = next(generate(1, 0, [kind]))
+    return {"file_base64": base64.b64encode(d.data).decode(), "file_name": f"cv.{EXTS[kind]}",
+            "file_mime": d.mime}
+
+
+def run_step(target: str, endpoint: str, concurrency: int, duration: float, warmup: float,
+             timeout: float, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    url = f"{target}/{endpoint}"
+    samples: List[Tuple[float, float, int]] = []  # (t_start, latency, status)
+    lock = threading.Lock()
+    t_begin = time.perf_counter()
+    t_measure = t_begin + warmup
+    t_end = t_measure + duration
+
+    def worker():
+        s = requests.Session()
+        local = []
+        while True:
+            t0 = time.perf_counter()
+            if t0 >= t_end:
+                break
+            try:
+                status = s.post(url, json=body, timeout=timeout).status_code
+            except requests.RequestException:
+                status = 0  # timeout / mất kết nối
+            dt = time.perf_counter() - t0
+            if t0 >= t_measure:
+                local.append((t0, dt, status))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # request bắt đầu trong cửa sổ đo có thể kết thúc sau t_end → tính trên thời gian thực tế
+    elapsed = max(t_end, max((t0 + dt for t0, dt, _ in samples), default=t_end)) - t_measure
+
+    ok = sorted(dt for _, dt, st in samples if st == 200)
+    all_lat = sorted(dt for _, dt, _ in samples)
+    statuses: Dict[str, int] = {}
+    for _, _, st in samples:
+        statuses[str(st)] = statuses.get(str(st), 0) + 1
+    n = len(samples)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": n,
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / n, 4) if n else None,
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": round(_pct(ok, 50) * 1000, 1),
+        "p95_ms": round(_pct(ok, 95) * 1000, 1),
+        "p99_ms": round(_pct(ok, 99) * 1000, 1),
+        "p99_all_ms": round(_pct(all_lat, 99) * 1000, 1),
+        "statuses": statuses,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Load test /parse-resume & /gemini/parse-resume với upstream giả lập")
+    ap.add_argument("--target", help="URL app đang chạy (mặc định tự bật uvicorn app.main:app)")
+    ap.add_argument("--stub", help="URL stub đang chạy (mặc định tự bật uvicorn bench.stubs:app)")
+    ap.add_argument("--app-port", type=int, default=8181)
+    ap.add_argument("--stub-port", type=int, default=9100)
+    ap.add_argument("--app-workers", type=int, default=1)
+    ap.add_argument("--endpoints", default=DEFAULT_ENDPOINTS,
+                    help=f"phân cách dấu phẩy; thêm '{BASE64_ENDPOINT}' để đo riêng extract+parse")
+    ap.add_argument("--concurrency", default="1,4,16")
+    ap.add_argument("--duration", type=float, default=10.0, help="giây đo mỗi bước")
+    ap.add_argument("--warmup", type=float, default=2.0, help="giây chạy trước mỗi bước, không tính")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--latency", default="gs=80,drive=40,openai=900,gemini=1200", help="ms trung vị / dịch vụ")
+    ap.add_argument("--jitter", type=float, default=0.25, help="sigma lognormal của latency")
+    ap.add_argument("--error-rate", default="", help="VD drive=0.01,gs=0.005 → HTTP 500")
+    ap.add_argument("--throttle-rate", default="", help="VD openai=0.02 → HTTP 429")
+    ap.add_argument("--kinds", default="text_pdf,docx", help="dạng file stub trả về (bench.corpus.KINDS)")
+    ap.add_argument("--out", help="ghi kết quả JSON")
+    a = ap.parse_args(argv)
+
+    procs: List[subprocess.Popen] = []
+    try:
+        stub = a.stub
+        if not stub:
+            stub = f"http://127.0.0.1:{a.stub_port}"
+            procs.append(_spawn("bench.stubs:app", a.stub_port, {
+                "STUB_LATENCY_MS": a.latency, "STUB_JITTER": str(a.jitter),
+                "STUB_ERROR_RATE": a.error_rate, "STUB_THROTTLE_RATE": a.throttle_rate,
+                "STUB_KINDS": a.kinds,
+            }))
+            _wait_ready(f"{stub}/healthz", 60, procs[-1])
+        requests.post(f"{stub}/_stub/config", timeout=5, json={
+            "latency_ms": a.latency, "jitter": a.jitter,
+            "error_rate": a.error_rate, "throttle_rate": a.throttle_rate,
+        }).raise_for_status()
+
+        target = a.target
+        startup = None
+        if not target:
+            target = f"http://127.0.0.1:{a.app_port}"
+            procs.append(_spawn("app.main:app", a.app_port, app_env(stub), a.app_workers))
+            startup = _wait_ready(f"{target}/health", 120, procs[-1])
+            print(f"app ready in {startup:.2f}s ({a.app_workers} worker)")
+
+        steps = []
+        print(f"\n{'endpoint':22} {'conc':>5} {'reqs':>6} {'rps':>8} {'err%':>6} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+        for ep in [e.strip("/ ") for e in a.endpoints.split(",") if e.strip()]:
+            for c in [int(x) for x in a.concurrency.split(",") if x]:
+                body = _base64_body(a.kinds.split(",")[0]) if ep == BASE64_ENDPOINT else None
+                r = run_step(target, ep, c, a.duration, a.warmup, a.timeout, body)
+                steps.append(r)
+                err = (r["error_rate"] or 0) * 100
+                print(f"{ep:22} {c:>5} {r['requests']:>6} {r['throughput_rps'] or 0:>8.2f} {err:>6.1f} "
+                      f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}  {r['statuses']}")
+        upstream = requests.get(f"{stub}/_stub/stats", timeout=5).json()
+        print(f"\nupstream calls: {json.dumps(upstream['stats'])}")
+
+        if a.out:
+            with open(a.out, "w", encoding="utf-8") as f:
+                json.dump({"args": vars(a), "app_startup_s": startup, "steps": steps,
+                           "upstream": upstream}, f, ensure_ascii=False, indent=2)
+            print(f"wrote {a.out}")
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
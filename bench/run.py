@@ -0,0 +1,277 @@
+# ===== Microbenchmark cho từng extractor / parser trên corpus tổng hợp + so với baseline =====
+#   python -m bench.run                                  # chạy, in bảng
+#   python -m bench.run --save-baseline                  # ghi bench/baseline.json
+#   python -m bench.run --compare bench/baseline.json    # exit 1 nếu có benchmark chậm hơn ngưỡng
+#   python -m bench.run --only parse. --per-kind 20 --out result.json
+#
+# Mỗi benchmark: latency từng lần gọi (p50/p95/p99), throughput (lần/giây, MB/giây đầu vào),
+# peak bộ nhớ Python (tracemalloc, 1 lượt riêng — không tính bộ nhớ C của pdfium/tesseract).
+# Benchmark OCR tự bỏ qua nếu máy không có tesseract.
+# Baseline phụ thuộc máy: so sánh chỉ có ý nghĩa khi chạy trên cùng máy/cấu hình đã tạo baseline.
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from bench.corpus import KINDS, Doc, generate
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.15   # chậm hơn baseline >15% (p50) → regression
+ACCURACY_TOLERANCE = 0.01  # độ chính xác tụt quá 1 điểm % → regression
+
+
+@dataclass
+class Bench:
+    name: str
+    fn: Callable[[Any], Any]
+    inputs: List[Any]
+    size: Callable[[Any], int] = len       # số byte/ký tự đầu vào (cho MB/s)
+    setup: Optional[Callable[[], None]] = None  # chạy trước mỗi lượt, không tính giờ (VD xoá cache)
+    skip: Optional[str] = None
+
+
+def _pct(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+def run_bench(b: Bench, min_time: float, max_rounds: int) -> Dict[str, Any]:
+    b.fn(b.inputs[0])  # warm-up: import lười, cache regex, nạp ontology...
+    lat: List[float] = []
+    nbytes = 0
+    total = 0.0
+    rounds = 0
+    gc.collect()
+    while rounds < max_rounds and (rounds == 0 or total < min_time):
+        if b.setup:
+            b.setup()
+        for x in b.inputs:
+            t0 = time.perf_counter()
+            b.fn(x)
+            dt = time.perf_counter() - t0
+            lat.append(dt)
+            total += dt
+            nbytes += b.size(x)
+        rounds += 1
+
+    # peak bộ nhớ: lượt riêng dưới tracemalloc (tracemalloc làm chậm → không trộn với đo giờ)
+    if b.setup:
+        b.setup()
+    tracemalloc.start()
+    peak = 0
+    for x in b.inputs:
+        tracemalloc.reset_peak()
+        b.fn(x)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    lat.sort()
+    return {
+        "calls": len(lat),
+        "rounds": rounds,
+        "ops_per_s": round(len(lat) / total, 2) if total else None,
+        "mb_per_s": round(nbytes / total / 1e6, 3) if total else None,
+        "mean_ms": round(total / len(lat) * 1000, 3),
+        "p50_ms": round(_pct(lat, 50) * 1000, 3),
+        "p95_ms": round(_pct(lat, 95) * 1000, 3),
+        "p99_ms": round(_pct(lat, 99) * 1000, 3),
+        "peak_py_kb": round(peak / 1024, 1),
+    }
+
+
+def _has_tesseract() -> bool:
+    from app.ocr import TESSERACT_CMD
+    return bool(shutil.which(TESSERACT_CMD or "tesseract"))
+
+
+def build_benches(docs: List[Doc]) -> List[Bench]:
+    from app.ocr import iter_image_pages, _pdf_pages
+    from app.utils import pdf as pdf_utils
+    from app.utils.common import split_sections_vi, heuristic_extract_basic, parse_skills_vi
+    from app.utils.contacts import scan_contacts
+    from app.utils.position import extract_position, _classify
+    from app.utils.sections import Section
+    from app.utils.skills import extract_skills
+    from app.parsers import heuristic_parse
+
+    by_kind: Dict[str, List[Doc]] = {k: [d for d in docs if d.kind == k] for k in KINDS}
+    texts = [d.text for d in by_kind["docx"] or docs]  # văn bản gốc (có dấu) — 1 bản / CV
+    skills_secs = [split_sections_vi(t).get(Section.SKILLS, "") for t in texts]
+    subjects = [d.truth["subject"] for d in by_kind["docx"] or docs]
+    blob = lambda d: len(d.data)
+    no_ocr = None if _has_tesseract() else "tesseract not installed"
+    ocr_langs = os.getenv("BENCH_OCR_LANGS", "vie+eng")
+
+    def extract(d: Doc):
+        return pdf_utils.extract_text_pages(d.data, d.mime, ocr_langs)
+
+    benches = [
+        # --- extractors: app/utils/pdf.extract_text_pages (đường API / ingest gọi thật) ---
+        Bench("extract.pdf_text", extract, by_kind["text_pdf"], blob),
+        Bench("extract.mixed_pdf", extract, by_kind["mixed_pdf"], blob),
+        Bench("extract.docx", extract, by_kind["docx"], blob),
+        Bench("extract.scanned_pdf", extract, by_kind["scanned_pdf"], blob, skip=no_ocr),
+        Bench("extract.photo_jpeg", extract, by_kind["photo_jpeg"], blob, skip=no_ocr),
+        Bench("extract.tiff", extract, by_kind["tiff"], blob, skip=no_ocr),
+        # --- các bước trước OCR (chạy được không cần tesseract) ---
+        Bench("decode.photo_jpeg", lambda d: list(iter_image_pages(d.data)), by_kind["photo_jpeg"], blob),
+        Bench("decode.tiff", lambda d: list(iter_image_pages(d.data)), by_kind["tiff"], blob),
+        Bench("render.scanned_pdf", lambda d: list(_pdf_pages(d.data)), by_kind["scanned_pdf"], blob),
+        Bench("payload.scanned_pdf", lambda d: pdf_utils.build_image_payload(d.data),
+              by_kind["scanned_pdf"], blob),
+        # --- parser (văn bản thuần) ---
+        Bench("parse.split_sections_vi", split_sections_vi, texts),
+        Bench("parse.heuristic_extract_basic", heuristic_extract_basic, texts),
+        Bench("parse.scan_contacts", scan_contacts, texts),
+        Bench("parse.parse_skills_vi", parse_skills_vi, skills_secs),
+        Bench("parse.extract_skills", extract_skills, texts),
+        Bench("parse.extract_position", extract_position, subjects, setup=_classify.cache_clear),
+        Bench("parse.heuristic_parse", heuristic_parse, texts),
+    ]
+    for b in benches:
+        if not b.inputs and not b.skip:
+            b.skip = "no inputs for this kind"
+    return benches
+
+
+# ---------- độ chính xác so với ground truth ----------
+
+def _digits(s: Optional[str]) -> str:
+    d = "".join(c for c in (s or "") if c.isdigit())
+    return "0" + d[2:] if d.startswith("84") else d
+
+
+def accuracy(docs: List[Doc], ocr: bool) -> Dict[str, Dict[str, float]]:
+    """heuristic_parse trên text trích từ từng dạng file (extractor production) → tỉ lệ đúng từng trường."""
+    from app.utils.pdf import extract_text_bytes
+    from app.parsers import heuristic_parse
+    from app.utils.position import extract_position
+    from app.utils.sections import fold
+
+    out: Dict[str, Dict[str, float]] = {}
+    for kind in KINDS:
+        if kind in ("scanned_pdf", "photo_jpeg", "tiff") and not ocr:
+            continue
+        rows = [d for d in docs if d.kind == kind]
+        if not rows:
+            continue
+        hit = {"full_name": 0, "email": 0, "phone": 0, "position": 0}
+        skill_recall = 0.0
+        for d in rows:
+            text, _ = extract_text_bytes(d.data, d.mime, os.getenv("BENCH_OCR_LANGS", "vie+eng"))
+            c = heuristic_parse(text)["candidate"]
+            t = d.truth
+            hit["full_name"] += fold(c.get("full_name") or "") == fold(t["full_name"])
+            hit["email"] += (c.get("email") or "").lower() == t["email"]
+            hit["phone"] += _digits(c.get("phone")) == t["phone_digits"]
+            hit["position"] += extract_position(t["subject"]) == t["position"]
+            got = set(c.get("skills") or [])
+            skill_recall += len(got & set(t["skills"])) / len(t["skills"])
+        n = len(rows)
+        out[kind] = {k: round(v / n, 3) for k, v in hit.items()}
+        out[kind]["skills_recall"] = round(skill_recall / n, 3)
+    return out
+
+
+# ---------- baseline ----------
+
+def compare(cur: Dict[str, Any], base: Dict[str, Any], threshold: float) -> List[str]:
+    """In bảng so sánh, trả danh sách regression."""
+    regressions = []
+    print(f"\n{'benchmark':34} {'base p50':>10} {'now p50':>10} {'ratio':>7}")
+    for name, r in cur["results"].items():
+        b = base.get("results", {}).get(name)
+        if not b or "p50_ms" not in r or "p50_ms" not in b or not b["p50_ms"]:
+            continue
+        ratio = r["p50_ms"] / b["p50_ms"]
+        flag = "  REGRESSION" if ratio > 1 + threshold else ("  faster" if ratio < 1 - threshold else "")
+        if flag == "  REGRESSION":
+            regressions.append(f"{name}: p50 {b['p50_ms']}ms → {r['p50_ms']}ms (x{ratio:.2f})")
+        print(f"{name:34} {b['p50_ms']:>10.3f} {r['p50_ms']:>10.3f} {ratio:>7.2f}{flag}")
+    for kind, fields in cur.get("accuracy", {}).items():
+        for f, v in fields.items():
+            old = base.get("accuracy", {}).get(kind, {}).get(f)
+            if old is not None and v < old - ACCURACY_TOLERANCE:
+                regressions.append(f"accuracy {kind}.{f}: {old} → {v}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark extractor/parser trên corpus CV tổng hợp")
+    ap.add_argument("--per-kind", type=int, default=8, help="số CV mỗi dạng file")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--only", default="", help="chỉ chạy benchmark có tên bắt đầu bằng (phân cách dấu phẩy)")
+    ap.add_argument("--min-time", type=float, default=1.0, help="thời gian đo tối thiểu / benchmark (giây)")
+    ap.add_argument("--max-rounds", type=int, default=200)
+    ap.add_argument("--out", help="ghi kết quả JSON")
+    ap.add_argument("--compare", nargs="?", const=BASELINE_PATH, help="so với baseline JSON")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    ap.add_argument("--save-baseline", nargs="?", const=BASELINE_PATH)
+    a = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    docs = list(generate(a.per_kind, a.seed))
+    print(f"corpus: {len(docs)} docs ({a.per_kind}/kind, seed={a.seed}) in {time.perf_counter() - t0:.1f}s")
+
+    prefixes = [p for p in a.only.split(",") if p]
+    results: Dict[str, Any] = {}
+    print(f"\n{'benchmark':34} {'ops/s':>9} {'MB/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KB':>9}")
+    for b in build_benches(docs):
+        if prefixes and not any(b.name.startswith(p) for p in prefixes):
+            continue
+        if b.skip:
+            results[b.name] = {"skipped": b.skip}
+            print(f"{b.name:34} skipped: {b.skip}")
+            continue
+        r = results[b.name] = run_bench(b, a.min_time, a.max_rounds)
+        print(f"{b.name:34} {r['ops_per_s']:>9.1f} {r['mb_per_s']:>8.2f} {r['p50_ms']:>9.3f} "
+              f"{r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['peak_py_kb']:>9.1f}")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "per_kind": a.per_kind,
+            "seed": a.seed,
+            "tesseract": _has_tesseract(),
+        },
+        "results": results,
+    }
+    if not prefixes:
+        report["accuracy"] = accuracy(docs, report["meta"]["tesseract"])
+        print("\naccuracy (heuristic_parse vs ground truth):")
+        for kind, fields in report["accuracy"].items():
+            print(f"  {kind:12} " + "  ".join(f"{k}={v:.2f}" for k, v in fields.items()))
+
+    for path in filter(None, (a.out, a.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"wrote {path}")
+
+    if a.compare:
+        with open(a.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("meta", {}).get("per_kind") != a.per_kind or base.get("meta", {}).get("seed") != a.seed:
+            print("warning: baseline được tạo với corpus khác (per_kind/seed) → so sánh không tương đương")
+        regressions = compare(report, base, a.threshold)
+        if regressions:
+            print("\nREGRESSIONS:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# ===== Server giả lập các dịch vụ ngoài cho load test (không cần mạng / key thật) =====
+# Một app duy nhất phục vụ:
+#   POST /gs                                   Apps Script (gs_post): get_newest_message_id, get_file_url_for_message
+#   GET  /uc?export=download&id=...            Google Drive tải file công khai (file lấy từ bench.corpus)
+#   POST /v1/chat/completions                  OpenAI-compatible (llm_parse)
+#   POST /v1beta/models/{model}:generateContent  Gemini REST (transport="rest")
+#   GET  /_stub/stats, POST /_stub/config      đếm lệnh gọi, đổi cấu hình lúc đang chạy
+# Trả lời LLM dựng từ ground truth của corpus (tra theo email xuất hiện trong prompt).
+#
+#   STUB_LATENCY_MS="gs=80,drive=40,openai=900,gemini=1200" STUB_ERROR_RATE="drive=0.01" \
+#   STUB_THROTTLE_RATE="openai=0.02" uvicorn bench.stubs:app --port 9100
+#
+# Latency mỗi lệnh gọi = ms * lognormal(0, STUB_JITTER) → có đuôi dài như dịch vụ thật.
+# error_rate → HTTP 500; throttle_rate (chỉ openai/gemini) → HTTP 429 đúng format của provider.
+
+import asyncio
+import json
+import os
+import random
+import re
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from bench.corpus import Doc, generate
+
+ROUTES = ("gs", "drive", "openai", "gemini")
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+
+
+def _parse_map(s: str) -> Dict[str, float]:
+    """'gs=80,openai=900' → {"gs": 80.0, "openai": 900.0}"""
+    out = {}
+    for part in (s or "").split(","):
+        if "=" in part:
+            k, v = part.split("=", 1)
+            out[k.strip()] = float(v)
+    return out
+
+
+CONFIG = {
+    "latency_ms": {**dict.fromkeys(ROUTES, 0.0), **_parse_map(os.getenv("STUB_LATENCY_MS", ""))},
+    "error_rate": {**dict.fromkeys(ROUTES, 0.0), **_parse_map(os.getenv("STUB_ERROR_RATE", ""))},
+    "throttle_rate": {"openai": 0.0, "gemini": 0.0, **_parse_map(os.getenv("STUB_THROTTLE_RATE", ""))},
+    "jitter": float(os.getenv("STUB_JITTER", "0.25")),
+}
+STATS: Dict[str, Dict[str, int]] = {r: {"calls": 0, "errors": 0, "throttled": 0} for r in ROUTES}
+
+_rng = random.Random(int(os.getenv("STUB_SEED", "0")))
+DOCS: List[Doc] = list(generate(int(os.getenv("STUB_PER_KIND", "8")), int(os.getenv("STUB_SEED", "0")),
+                                [k for k in os.getenv("STUB_KINDS", "text_pdf,docx").split(",") if k]))
+BY_FILE_ID = {f"stubfile_{i:06d}_{d.kind}": d for i, d in enumerate(DOCS)}
+FILE_IDS = list(BY_FILE_ID)
+BY_EMAIL = {d.truth["email"]: d for d in DOCS}
+_next = 0
+
+app = FastAPI(title="resume-parser upstream stubs")
+
+
+async def _inject(route: str):
+    """Chờ latency giả lập; trả Response lỗi nếu trúng tỉ lệ lỗi, ngược lại None."""
+    st = STATS[route]
+    st["calls"] += 1
+    ms = CONFIG["latency_ms"].get(route, 0.0)
+    if ms > 0:
+        await asyncio.sleep(ms * _rng.lognormvariate(0, CONFIG["jitter"]) / 1000.0)
+    if _rng.random() < CONFIG["throttle_rate"].get(route, 0.0):
+        st["throttled"] += 1
+        if route == "gemini":
+            body = {"error": {"code": 429, "message": "Resource has been exhausted (stub)",
+                              "status": "RESOURCE_EXHAUSTED"}}
+        else:
+            body = {"error": {"message": "Rate limit reached (stub)", "type": "requests",
+                              "code": "rate_limit_exceeded"}}
+        return JSONResponse(body, status_code=429, headers={"retry-after": "1"})
+    if _rng.random() < CONFIG["error_rate"].get(route, 0.0):
+        st["errors"] += 1
+        return JSONResponse({"error": {"code": 500, "message": "injected error (stub)"}}, status_code=500)
+    return None
+
+
+def _doc_for(text: str) -> Doc:
+    for m in EMAIL_RE.finditer(text or ""):
+        d = BY_EMAIL.get(m.group(0).lower())
+        if d is not None:
+            return d
+    return DOCS[0]
+
+
+def _education(d: Doc) -> List[dict]:
+    for ln in d.text.split("\n"):
+        if ln.startswith("Đại học") or ln.startswith("Dai hoc"):
+            return [{"school": ln.split("  ")[0], "gpa": "3.2"}]
+    return []
+
+
+# ---------- Apps Script ----------
+
+@app.post("/gs")
+async def gs(request: Request):
+    global _next
+    err = await _inject("gs")
+    if err is not None:
+        return err
+    body = await request.json()
+    action = body.get("action")
+    if action == "get_newest_message_id":
+        fid = FILE_IDS[_next % len(FILE_IDS)]
+        _next += 1
+        return {"ok": True, "message_id": fid, "subject": BY_FILE_ID[fid].truth["subject"]}
+    if action == "get_file_url_for_message":
+        fid = body.get("message_id") or ""
+        d = BY_FILE_ID.get(fid)
+        if d is None:
+            return {"ok": False, "error": "message_not_found"}
+        base = str(request.base_url).rstrip("/")
+        return {"ok": True, "message_id": fid, "file_id": fid, "file_mime": d.mime,
+                "file_url": f"{base}/uc?export=download&id={fid}"}
+    return {"ok": False, "error": f"unknown_action: {action}"}
+
+
+# ---------- Google Drive ----------
+
+@app.get("/uc")
+async def drive(id: str = ""):
+    err = await _inject("drive")
+    if err is not None:
+        return err
+    d = BY_FILE_ID.get(id)
+    if d is None:
+        return Response(status_code=404)
+    return Response(d.data, media_type=d.mime)
+
+
+# ---------- OpenAI-compatible ----------
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    err = await _inject("openai")
+    if err is not None:
+        return err
+    body = await request.json()
+    prompt = "".join(m["content"] for m in body.get("messages", []) if isinstance(m.get("content"), str))
+    d = _doc_for(prompt)
+    t = d.truth
+    content = json.dumps({
+        "ok": True,
+        "candidate": {"full_name": t["full_name"], "email": t["email"], "phone": t["phone_digits"],
+                      "location": "", "skills": t["skills"], "languages": [], "links": {}},
+        "education": _education(d),
+        "experiences": [], "projects": [], "certifications": [],
+    }, ensure_ascii=False)
+    pt = len(prompt) // 4
+    ct = len(content) // 4
+    return {
+        "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                     "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": pt, "completion_tokens": ct, "total_tokens": pt + ct},
+    }
+
+
+# ---------- Gemini REST ----------
+
+@app.post("/v1beta/models/{model}:generateContent")
+async def gemini_generate(model: str, request: Request):
+    err = await _inject("gemini")
+    if err is not None:
+        return err
+    body = await request.json()
+    texts = [p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", [])]
+    n_images = sum(1 for c in body.get("contents", []) for p in c.get("parts", []) if "inline_data" in p
+                   or "inlineData" in p)
+    d = _doc_for("\n".join(texts))
+    t = d.truth
+    edu = _education(d)
+    text = json.dumps({
+        "candidate": {"full_name": t["full_name"], "email": t["email"], "phone": t["phone_digits"],
+                      "location": "", "skills": t["skills"],
+                      "school": edu[0]["school"] if edu else "", "gpa": edu[0]["gpa"] if edu else ""},
+        "education": edu, "experiences": [], "summary": "",
+    }, ensure_ascii=False)
+    pt = sum(len(x) for x in texts) // 4 + 258 * n_images
+    ct = len(text) // 4
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                        "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": pt, "candidatesTokenCount": ct, "totalTokenCount": pt + ct},
+    }
+
+
+# ---------- điều khiển ----------
+
+@app.get("/_stub/stats")
+async def stub_stats():
+    return {"config": CONFIG, "stats": STATS, "docs": len(DOCS)}
+
+
+@app.post("/_stub/config")
+async def stub_config(request: Request):
+    """Body: {"latency_ms": {"openai": 2000} | "openai=2000", "error_rate": ..., "throttle_rate": ..., "jitter": 0.5}"""
+    body = await request.json()
+    for k in ("latency_ms", "error_rate", "throttle_rate"):
+        v = body.get(k) or {}
+        CONFIG[k].update(_parse_map(v) if isinstance(v, str) else {r: float(x) for r, x in v.items()})
+    if "jitter" in body:
+        CONFIG["jitter"] = float(body["jitter"])
+    for st in STATS.values():
+        st.update(calls=0, errors=0, throttled=0)
+    return {"config": CONFIG}
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"ok": True}
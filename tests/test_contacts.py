@@ -0,0 +1,14 @@
+from app.utils.contacts import scan_contacts
+
+
+def test_phone_shapes():
+    assert scan_contacts("SĐT: 0901 234 567").phones == ["+84901234567"]
+    assert scan_contacts("Phone: +84 901 234 567").phones == ["+84901234567"]
+    assert scan_contacts("(+84) 901-234-567, 0912.345.678").phones == ["+84901234567", "+84912345678"]
+
+
+def test_years_and_dates_are_not_phones():
+    # khoảng thời gian học / làm việc không được thành số điện thoại
+    assert scan_contacts("Đại học Bách Khoa 2016-2020 2021").phones == []
+    assert scan_contacts("1998 - 2002 2003 2004").phones == []
+    assert scan_contacts("01.02.2020 - 03.04.2021").phones == []
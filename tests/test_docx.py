@@ -0,0 +1,31 @@
+import io
+import zipfile
+
+from app.utils.docx import extract_docx_text
+
+NS = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+      'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+      'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+      'xmlns:v="urn:schemas-microsoft-com:vml"')
+
+
+def _docx(body: str) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("word/document.xml", f"<w:document {NS}><w:body>{body}</w:body></w:document>")
+    return buf.getvalue()
+
+
+def test_tab_stop_definitions_are_not_text():
+    body = ('<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="2000"/><w:tab w:val="right" w:pos="9000"/>'
+            '</w:tabs></w:pPr><w:r><w:t>Name</w:t><w:tab/><w:t>2020</w:t></w:r></w:p>')
+    assert extract_docx_text(_docx(body)) == "Name\t2020\n"
+
+
+def test_text_box_fallback_is_not_duplicated():
+    box = '<w:txbxContent><w:p><w:r><w:t>BOXTEXT</w:t></w:r></w:p></w:txbxContent>'
+    body = ('<w:p><w:r><mc:AlternateContent>'
+            f'<mc:Choice Requires="wps"><w:drawing><wps:txbx>{box}</wps:txbx></w:drawing></mc:Choice>'
+            f'<mc:Fallback><w:pict><v:textbox>{box}</v:textbox></w:pict></mc:Fallback>'
+            '</mc:AlternateContent></w:r></w:p>')
+    assert extract_docx_text(_docx(body)).split() == ["BOXTEXT"]
@@ -0,0 +1,17 @@
+from app.utils.sections import Section, match_heading, sections_dict
+
+
+def test_heading_variants_with_short_suffix():
+    assert match_heading("EXPERIENCE") is Section.EXPERIENCE
+    assert match_heading("Kinh nghiệm làm việc:") is Section.EXPERIENCE
+    assert match_heading("Technical skills:") is Section.SKILLS
+    assert match_heading("HỌC VẤN & BẰNG CẤP") is Section.EDUCATION
+
+
+def test_body_line_starting_with_variant_is_not_heading():
+    # câu trong thân bắt đầu bằng biến thể heading tiếng Anh không được mở section mới
+    assert match_heading("Experience with Docker and CI") is None
+    assert match_heading("Internships and research at FPT") is None
+
+    text = "SKILLS\nPython, SQL\nExperience with Docker and CI\n"
+    assert sections_dict(text) == {Section.SKILLS: "Python, SQL\nExperience with Docker and CI"}